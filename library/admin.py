@@ -1,6 +1,28 @@
 from django.contrib import admin
+from django.db import transaction
 
-from library.models import Book, Borrowing
+from library.models import ArchivedBorrowing, Book, Borrowing
+from library.summary import rebuild_summary
 
 admin.site.register(Book)
-admin.site.register(Borrowing)
+
+
+@admin.register(Borrowing)
+class BorrowingAdmin(admin.ModelAdmin):
+    list_select_related = ("book",)
+
+    # Admin edits can change anything, so summaries are rebuilt.
+    # Deletes rebuild them through the post_delete signal.
+    def save_model(self, request, obj, form, change):
+        user_ids = {obj.user_id}
+        if change:
+            user_ids.add(form.initial.get("user"))
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            for user_id in user_ids - {None}:
+                rebuild_summary(user_id)
+
+
+@admin.register(ArchivedBorrowing)
+class ArchivedBorrowingAdmin(admin.ModelAdmin):
+    list_select_related = ("book",)
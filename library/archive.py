@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.db import connection, transaction
+
+from library.models import ArchivedBorrowing, Borrowing
+
+ARCHIVE_FIELDS = (
+    "id",
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+    "book_id",
+    "user_id",
+)
+
+
+def archive_borrowings(returned_before: date, batch_size: int = 1000) -> int:
+    """
+    Move borrowings returned before ``returned_before`` to the archive.
+
+    Each batch is copied and deleted in its own transaction, so the live
+    table is never locked for long and an interrupted run loses nothing.
+    Rows keep their ids, and ``BorrowingHistory`` reads both tables, so
+    history lists and links are unchanged. For the same reason the rows
+    are deleted with a single DELETE, without the delete signals that
+    would invalidate caches and rebuild summaries per row. Returns the
+    number of rows moved.
+    """
+    returned = Borrowing.objects.filter(
+        actual_return_date__lt=returned_before
+    )
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                returned.select_for_update()
+                .order_by("id")
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ArchivedBorrowing.objects.bulk_create(
+                ArchivedBorrowing(**row) for row in rows
+            )
+            delete_borrowings([row["id"] for row in rows])
+        archived += len(rows)
+    return archived
+
+
+def delete_borrowings(ids: list) -> None:
+    sql = "DELETE FROM {} WHERE {} IN ({})".format(
+        connection.ops.quote_name(Borrowing._meta.db_table),
+        connection.ops.quote_name(Borrowing._meta.pk.column),
+        ", ".join(["%s"] * len(ids)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ids)
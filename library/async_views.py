@@ -0,0 +1,267 @@
+"""
+Native async ``list`` and ``retrieve`` for the library viewsets.
+
+Under ASGI a synchronous view holds a worker thread for the whole
+request. These views stay on the event loop instead: authentication,
+permissions and the ETag and catalog cache checks run in a single
+``sync_to_async`` call, rows are fetched with the async ORM and the
+response is rendered on the loop. Other methods are handed to the
+regular viewset. Enabled by the ``LIBRARY_ASYNC_READS`` setting.
+
+``book_events`` streams availability changes as server-sent events.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    StreamingHttpResponse,
+)
+from rest_framework import status
+from rest_framework.response import Response
+
+from library.cache import (
+    CATALOG_VERSION_KEY,
+    cacheable,
+    cached_catalog_data,
+    catalog_cache_key,
+    etag_matches,
+    response_etag,
+)
+from library.events import inventory_events
+from library.models import Book
+
+LIST_ACTIONS = {"get": "list", "head": "list", "post": "create"}
+DETAIL_ACTIONS = {
+    "get": "retrieve",
+    "head": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+}
+READ_METHODS = ("GET", "HEAD")
+
+
+def async_read_view(viewset_class, actions: dict):
+    """Route ``actions`` of a viewset, serving reads asynchronously."""
+    sync_view = sync_to_async(viewset_class.as_view(actions))
+
+    async def view(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_view(request, *args, **kwargs)
+        return await AsyncRead(viewset_class, actions).dispatch(
+            request, *args, **kwargs
+        )
+
+    view.cls = viewset_class
+    view.actions = actions
+    view.csrf_exempt = True
+    return view
+
+
+class AsyncRead:
+    def __init__(self, viewset_class, actions: dict) -> None:
+        self.viewset = viewset_class()
+        self.viewset.action_map = actions
+
+    async def dispatch(self, request, *args, **kwargs):
+        viewset = self.viewset
+        viewset.args = args
+        viewset.kwargs = kwargs
+        request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = request
+        viewset.headers = viewset.default_response_headers
+        method = getattr(type(viewset), viewset.action)
+
+        try:
+            response = await sync_to_async(self.prepare)(request, method)
+            if response is None:
+                response = await self.respond(request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+
+        response = viewset.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return rendered(response)
+
+    def prepare(self, request, method) -> Response | None:
+        """Run the synchronous checks, answering from caches if possible."""
+        self.viewset.initial(request)
+
+        self.etag = None
+        if settings.LIBRARY_RESPONSE_CACHE and getattr(
+            method, "conditional_response", False
+        ):
+            self.etag = response_etag(self.viewset, request)
+            if etag_matches(request, self.etag):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": self.etag},
+                )
+
+        self.cache_key = None
+        if settings.LIBRARY_RESPONSE_CACHE and getattr(
+            method, "catalog_cached", False
+        ):
+            self.cache_key = catalog_cache_key(request, self.viewset.action)
+            data = cached_catalog_data(self.cache_key)
+            if data is not None:
+                return self.tag(Response(data))
+        return None
+
+    async def respond(self, request) -> Response:
+        if self.viewset.action == "list":
+            response = await self.list(request)
+        else:
+            response = await self.retrieve(request)
+
+        if self.cache_key and cacheable(response, [CATALOG_VERSION_KEY]):
+            await cache.aset(
+                self.cache_key, response.data, settings.CATALOG_CACHE_TIMEOUT
+            )
+        return self.tag(response)
+
+    def tag(self, response: Response) -> Response:
+        version_keys = self.viewset.get_etag_version_keys()
+        if self.etag and cacheable(response, version_keys):
+            response["ETag"] = self.etag
+        return response
+
+    async def list(self, request) -> Response:
+        viewset = self.viewset
+        if not settings.LIBRARY_FAST_LISTS:
+            # The serializer path, past the decorators ``prepare`` ran.
+            serialized_list = super(type(viewset), viewset).list
+            return await sync_to_async(serialized_list)(request)
+
+        rows = viewset.get_row_serializer()
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        queryset = queryset.values(*viewset.get_list_columns(rows))
+
+        if viewset.paginator is None:
+            return Response(rows.render([row async for row in queryset]))
+
+        page = await viewset.paginator.apaginate_queryset(
+            queryset, request, view=viewset
+        )
+        if page is None:
+            return Response(rows.render([row async for row in queryset]))
+        return viewset.get_paginated_response(rows.render(page))
+
+    async def retrieve(self, request) -> Response:
+        viewset = self.viewset
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        lookup = {viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]}
+
+        try:
+            instance = await queryset.aget(**lookup)
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise Http404
+
+        viewset.check_object_permissions(request, instance)
+        return Response(viewset.get_serializer(instance).data)
+
+
+def rendered(response: Response) -> HttpResponse:
+    """
+    Render on the event loop.
+
+    Django would run ``render()`` of a returned template-like response
+    through ``sync_to_async``, so a plain ``HttpResponse`` is returned.
+    """
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    return plain
+
+
+def parse_book_ids(value: str) -> set:
+    try:
+        book_ids = {int(book_id) for book_id in value.split(",")}
+    except ValueError:
+        raise ValueError("ids must be comma-separated book ids")
+    if len(book_ids) > settings.INVENTORY_STREAM_MAX_BOOKS:
+        raise ValueError(
+            f"At most {settings.INVENTORY_STREAM_MAX_BOOKS} books "
+            f"can be watched"
+        )
+    return book_ids
+
+
+def inventory_event(book_id: int, inventory: int) -> str:
+    data = json.dumps({"id": book_id, "inventory": inventory})
+    return f"event: inventory\ndata: {data}\n\n"
+
+
+async def inventory_stream(subscription, book_ids: set):
+    try:
+        rows = Book.objects.filter(pk__in=book_ids).values_list(
+            "id", "inventory"
+        )
+        yield "retry: 5000\n\n" + "".join(
+            [inventory_event(*row) async for row in rows]
+        )
+
+        loop = asyncio.get_running_loop()
+        closes = loop.time() + settings.INVENTORY_STREAM_TIMEOUT
+        while (remaining := closes - loop.time()) > 0:
+            changes = await subscription.wait(
+                min(settings.INVENTORY_STREAM_KEEPALIVE, remaining)
+            )
+            if changes:
+                yield "".join(
+                    inventory_event(book_id, inventory)
+                    for book_id, inventory in sorted(changes.items())
+                )
+            else:
+                yield ": keepalive\n\n"
+    finally:
+        inventory_events.unsubscribe(subscription)
+
+
+async def book_events(request):
+    """
+    Stream ``inventory`` events of the books in ``?ids=1,2``.
+
+    The current inventory of each book is sent first, then every change.
+    Streams close after ``INVENTORY_STREAM_TIMEOUT`` seconds and browsers
+    reconnect on their own; the disconnect of a client is only noticed
+    then, as Django doesn't cancel streaming responses. Requires ASGI:
+    a WSGI worker would be held for the whole stream.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(
+            "Event streams are only served under ASGI", status=501
+        )
+    try:
+        book_ids = parse_book_ids(request.GET.get("ids", ""))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    # Subscribed before the first read, so no change is missed.
+    subscription = inventory_events.subscribe(book_ids)
+    response = StreamingHttpResponse(
+        inventory_stream(subscription, book_ids),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
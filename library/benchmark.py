@@ -0,0 +1,293 @@
+"""
+HTTP load benchmark for the library API.
+
+Every scenario is run by ``concurrency`` threads for ``duration``
+seconds against a running server, each thread keeping its own
+keep-alive connection and JWT. Results hold throughput, latency
+percentiles and, when the server reports it in ``Server-Timing``, the
+number of SQL statements per request.
+
+To compare deployments, run the same scenarios against each one and
+pass the first results file to ``--compare``, e.g. gunicorn (WSGI)
+first, then uvicorn with ``LIBRARY_ASYNC_READS=True`` (ASGI with the
+async read views)::
+
+    gunicorn -w 4 library_service_api.wsgi
+    manage.py benchmark_api --label wsgi --output wsgi.json
+    export LIBRARY_ASYNC_READS=True
+    uvicorn --workers 4 library_service_api.asgi:application
+    manage.py benchmark_api --label asgi --compare wsgi.json
+"""
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlencode, urlsplit
+
+SEARCH_TERMS = ("harry", "tar", "orwell", "kob", "night", "shadow", "gat")
+
+
+class Client:
+    def __init__(self, base_url: str) -> None:
+        url = urlsplit(base_url)
+        self.connection_class = (
+            HTTPSConnection if url.scheme == "https" else HTTPConnection
+        )
+        self.netloc = url.netloc
+        self.prefix = url.path.rstrip("/")
+        self.connection = None
+        self.token = None
+        self.email = None
+
+    def request(self, method: str, path: str, data=None, params=None):
+        """Send one request and return ``(status, latency, queries, body)``."""
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        headers = {"Accept": "application/json"}
+        body = None
+        if data is not None:
+            body = json.dumps(data)
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(
+                    self.netloc, timeout=30
+                )
+            started = time.perf_counter()
+            try:
+                self.connection.request(
+                    method, self.prefix + path, body, headers
+                )
+                response = self.connection.getresponse()
+                content = response.read()
+            except (HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+                continue
+            latency = time.perf_counter() - started
+            queries = sql_queries(response.getheader("Server-Timing"))
+            return response.status, latency, queries, content
+
+    def login(self, email: str, password: str) -> dict:
+        status, _, _, content = self.request(
+            "POST", "/api/user/token/", {"email": email, "password": password}
+        )
+        if status != 200:
+            raise RuntimeError(f"Can't log in as {email}: {status}")
+        tokens = json.loads(content)
+        self.token = tokens["access"]
+        return tokens
+
+
+def sql_queries(server_timing: str | None) -> int | None:
+    """Read the ``sql;desc=N`` entry of a Server-Timing header."""
+    for metric in (server_timing or "").split(","):
+        name, *params = (part.strip() for part in metric.split(";"))
+        if name != "sql":
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "desc":
+                try:
+                    return int(value.strip('"'))
+                except ValueError:
+                    return None
+    return None
+
+
+def browse_books(client, context, rng) -> list:
+    offset = rng.randrange(0, max(context["books"], 1), 20)
+    return [
+        client.request(
+            "GET", "/api/library/books/", params={"offset": offset}
+        )
+    ]
+
+
+def retrieve_book(client, context, rng) -> list:
+    book_id = rng.choice(context["hot_books"])
+    return [client.request("GET", f"/api/library/books/{book_id}/")]
+
+
+def search_books(client, context, rng) -> list:
+    return [
+        client.request(
+            "GET",
+            "/api/library/books/",
+            params={"q": rng.choice(SEARCH_TERMS)},
+        )
+    ]
+
+
+def list_borrowings(client, context, rng) -> list:
+    return [client.request("GET", "/api/library/borrowings/")]
+
+
+def checkout_return(client, context, rng) -> list:
+    checkout = client.request(
+        "POST",
+        "/api/library/borrowings/",
+        {
+            "book": rng.choice(context["hot_books"]),
+            "expected_return_date": str(date.today() + timedelta(days=7)),
+        },
+    )
+    samples = [checkout]
+    if checkout[0] == 201:
+        borrowing_id = json.loads(checkout[3])["id"]
+        samples.append(
+            client.request(
+                "POST",
+                f"/api/library/borrowings/{borrowing_id}/return-book/",
+            )
+        )
+    return samples
+
+
+def obtain_refresh_token(client, context, rng) -> list:
+    obtain = client.request(
+        "POST",
+        "/api/user/token/",
+        {"email": client.email, "password": context["password"]},
+    )
+    samples = [obtain]
+    if obtain[0] == 200:
+        refresh = json.loads(obtain[3])["refresh"]
+        samples.append(
+            client.request(
+                "POST", "/api/user/token/refresh/", {"refresh": refresh}
+            )
+        )
+    return samples
+
+
+SCENARIOS = {
+    "books-browse": (browse_books, False),
+    "books-detail": (retrieve_book, False),
+    "books-search": (search_books, False),
+    "borrowings-list": (list_borrowings, True),
+    "checkout-return": (checkout_return, True),
+    "token": (obtain_refresh_token, False),
+}
+
+
+def percentile(values: list, share: float) -> float | None:
+    if not values:
+        return None
+    index = min(int(len(values) * share), len(values) - 1)
+    return values[index]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = sorted(latency for _, latency, _, _ in samples)
+    queries = [count for _, _, count, _ in samples if count is not None]
+    errors = sum(1 for status, _, _, _ in samples if status >= 400)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    mean = sum(latencies) / len(latencies) if latencies else None
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "requests_per_second": round(len(samples) / elapsed, 2),
+        "latency_ms": {
+            "mean": ms(mean),
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "sql_queries_per_request": (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def run_scenario(
+    name: str,
+    base_url: str,
+    context: dict,
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> dict:
+    scenario, authenticated = SCENARIOS[name]
+    samples = []
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+    failures = []
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        client = Client(base_url)
+        client.email = context["users"][index % len(context["users"])]
+        try:
+            if authenticated:
+                client.login(client.email, context["password"])
+        except Exception as error:
+            failures.append(error)
+            start.abort()
+            return
+
+        local = []
+        try:
+            start.wait()
+        except threading.BrokenBarrierError:
+            return
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            try:
+                local += scenario(client, context, rng)
+            except (HTTPException, OSError):
+                # Count connection failures as server errors.
+                local.append((599, 0.0, None, b""))
+        with lock:
+            samples.extend(local)
+
+    threads = [
+        threading.Thread(target=worker, args=(index,), daemon=True)
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        start.wait()
+    except threading.BrokenBarrierError:
+        raise RuntimeError(f"{name}: {failures[0]}")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+
+    return summarize(samples, time.perf_counter() - started)
+
+
+def compare(previous: dict, current: dict) -> dict:
+    """Relative change of throughput and p95 per scenario."""
+    changes = {}
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            "requests_per_second": relative(
+                before["requests_per_second"], result["requests_per_second"]
+            ),
+            "p95": relative(
+                before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+            ),
+        }
+    return changes
+
+
+def relative(before, after) -> float | None:
+    if not before or after is None:
+        return None
+    return round((after - before) / before * 100, 1)
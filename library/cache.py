@@ -0,0 +1,158 @@
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from library.metrics import registry
+from library.routers import mark_recent_writes, read_may_be_stale
+
+CATALOG_VERSION_KEY = "library:catalog:version"
+BORROWINGS_VERSION_KEY = "library:borrowings:version"
+
+
+def borrowings_version_key(user_id: int = None) -> str:
+    if user_id is None:
+        return BORROWINGS_VERSION_KEY
+    return f"library:borrowings:{user_id}:version"
+
+
+def get_version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # A clock-based start value cannot collide with entries cached
+        # under a version that was evicted or lost on restart.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(*keys: str) -> None:
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    mark_recent_writes(keys)
+
+
+def invalidate(*keys: str, using: str = None) -> None:
+    """
+    Bump the given version keys.
+
+    The versions are bumped right away so this process stops serving old
+    entries, and once more on commit to drop anything a concurrent read
+    cached from the not yet committed state.
+    """
+    bump_versions(*keys)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_versions(*keys), using=using)
+
+
+def catalog_version() -> int:
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog(using: str = None) -> None:
+    invalidate(CATALOG_VERSION_KEY, using=using)
+
+
+def invalidate_borrowings(user_ids, using: str = None) -> None:
+    """Bump the global borrowings version and the version of each user."""
+    keys = [borrowings_version_key(user_id) for user_id in set(user_ids)]
+    invalidate(BORROWINGS_VERSION_KEY, *keys, using=using)
+
+
+def catalog_cache_key(request, action: str) -> str:
+    url = md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"library:catalog:{catalog_version()}:{action}:{url}"
+
+
+def cached_catalog_data(key: str):
+    data = cache.get(key)
+    registry.inc(
+        "library_cache_requests_total",
+        cache="catalog",
+        result="miss" if data is None else "hit",
+    )
+    return data
+
+
+def cacheable(response, version_keys) -> bool:
+    """Whether a response may be cached or tagged with the given versions."""
+    if response.status_code != status.HTTP_200_OK:
+        return False
+    return not read_may_be_stale(version_keys)
+
+
+def cache_catalog_response(method):
+    """Cache successful responses of a book view action by catalog version."""
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.LIBRARY_RESPONSE_CACHE:
+            return method(self, request, *args, **kwargs)
+
+        key = catalog_cache_key(request, method.__name__)
+        data = cached_catalog_data(key)
+        if data is not None:
+            return Response(data)
+
+        response = method(self, request, *args, **kwargs)
+        if cacheable(response, [CATALOG_VERSION_KEY]):
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    wrapper.catalog_cached = True
+    return wrapper
+
+
+def response_etag(view, request) -> str:
+    version = view.get_etag_version()
+    url = request.build_absolute_uri()
+    return quote_etag(md5(f"{version}:{url}".encode()).hexdigest())
+
+
+def etag_matches(request, etag: str) -> bool:
+    matched = etag in parse_etags(request.headers.get("If-None-Match", ""))
+    registry.inc(
+        "library_cache_requests_total",
+        cache="etag",
+        result="hit" if matched else "miss",
+    )
+    return matched
+
+
+def conditional_response(method):
+    """
+    Answer ``If-None-Match`` from the view's version without rendering.
+
+    The strong ETag is derived from ``view.get_etag_version()`` and the
+    request URL, so an unchanged poll returns 304 before any queryset or
+    serializer runs. ``view.get_etag_version_keys()`` names the versions
+    it is computed from. Off without ``LIBRARY_RESPONSE_CACHE``.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.LIBRARY_RESPONSE_CACHE:
+            return method(self, request, *args, **kwargs)
+
+        etag = response_etag(self, request)
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = method(self, request, *args, **kwargs)
+        if cacheable(response, self.get_etag_version_keys()):
+            response["ETag"] = etag
+        return response
+
+    wrapper.conditional_response = True
+    return wrapper
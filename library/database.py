@@ -0,0 +1,20 @@
+from django.conf import settings
+
+
+def configure_sqlite(connection) -> None:
+    """
+    Apply ``SQLITE_PRAGMAS`` to a new SQLite connection.
+
+    WAL lets readers run while a borrow or return is being written,
+    ``busy_timeout`` makes writers wait for the lock instead of failing
+    with "database is locked", ``synchronous=NORMAL`` is durable enough
+    in WAL mode and ``mmap_size`` serves reads from memory-mapped pages.
+    The statements bypass execute wrappers so they are not counted as
+    request queries.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    raw = connection.connection
+    for pragma, value in settings.SQLITE_PRAGMAS.items():
+        raw.execute(f"PRAGMA {pragma} = {value}").fetchall()
@@ -0,0 +1,185 @@
+"""
+Fan-out of book inventory changes to server-sent event streams.
+
+Code that changes inventory calls ``publish_inventory`` with the book
+ids; once the transaction commits, every subscription of this process
+interested in one of those books gets the current inventory, read in a
+single query and only when someone is listening. Changes are coalesced
+per subscription, so a slow client only ever receives the latest value.
+
+With ``INVENTORY_EVENTS_DIR`` set, book ids are instead sent as a
+datagram to a Unix socket per listening process in that directory,
+which lets the workers of one host share changes without a broker.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+SOCKET_PREFIX = "events-"
+MAX_DATAGRAM = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, book_ids) -> None:
+        self.book_ids = frozenset(book_ids)
+        self.loop = asyncio.get_running_loop()
+        self.changes = {}
+        self.changed = asyncio.Event()
+
+    def push(self, changes: dict) -> None:
+        self.changes.update(changes)
+        self.changed.set()
+
+    async def wait(self, timeout: float) -> dict:
+        """Return the changes since the last call, waiting up to timeout."""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self.changed.clear()
+        changes, self.changes = self.changes, {}
+        return changes
+
+
+class SocketBroker:
+    """Exchange book ids between the processes of one host."""
+
+    def __init__(self, on_message) -> None:
+        self.on_message = on_message
+        self.sender = None
+        self.pid = None
+
+    @staticmethod
+    def directory() -> Path:
+        return Path(settings.INVENTORY_EVENTS_DIR)
+
+    def path(self) -> Path:
+        return self.directory() / f"{SOCKET_PREFIX}{os.getpid()}.sock"
+
+    def listen(self) -> None:
+        """Bind this process's socket and start receiving, once per pid."""
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        path = self.path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(str(path))
+        threading.Thread(
+            target=self.receive,
+            args=(receiver,),
+            name="inventory-events",
+            daemon=True,
+        ).start()
+
+    def receive(self, receiver) -> None:
+        while True:
+            message = receiver.recv(MAX_DATAGRAM)
+            try:
+                book_ids = set(json.loads(message))
+            except (TypeError, ValueError):
+                logger.exception("Malformed inventory message %r", message)
+                continue
+            # Database connections of this thread are never closed by
+            # the request cycle.
+            close_old_connections()
+            try:
+                self.on_message(book_ids)
+            except Exception:
+                logger.exception("Dispatching inventory changes failed")
+
+    def send(self, book_ids: set) -> None:
+        if self.sender is None:
+            self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sender.setblocking(False)
+        message = json.dumps(sorted(book_ids)).encode()
+        for path in self.directory().glob(f"{SOCKET_PREFIX}*.sock"):
+            try:
+                self.sender.sendto(message, str(path))
+            except ConnectionRefusedError:
+                # Left behind by a process that is gone.
+                path.unlink(missing_ok=True)
+            except (BlockingIOError, FileNotFoundError):
+                pass
+
+
+class InventoryEvents:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.broker = SocketBroker(self.dispatch)
+
+    def subscribe(self, book_ids) -> Subscription:
+        subscription = Subscription(book_ids)
+        if settings.INVENTORY_EVENTS_DIR:
+            self.broker.listen()
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, book_ids: set) -> None:
+        if settings.INVENTORY_EVENTS_DIR:
+            self.broker.send(book_ids)
+        else:
+            self.dispatch(book_ids)
+
+    def dispatch(self, book_ids: set) -> None:
+        from library.models import Book
+
+        with self.lock:
+            interested = [
+                subscription
+                for subscription in self.subscriptions
+                if subscription.book_ids & book_ids
+            ]
+        if not interested:
+            return
+
+        wanted = set().union(
+            *(subscription.book_ids & book_ids for subscription in interested)
+        )
+        inventory = dict(
+            Book.objects.filter(pk__in=wanted).values_list("id", "inventory")
+        )
+        for subscription in interested:
+            changes = {
+                book_id: inventory[book_id]
+                for book_id in subscription.book_ids & book_ids
+                if book_id in inventory
+            }
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.push, changes
+                )
+            except RuntimeError:
+                # The loop of a finished stream is closed.
+                self.unsubscribe(subscription)
+
+
+inventory_events = InventoryEvents()
+
+
+def publish_inventory(book_ids, using: str = None) -> None:
+    """Announce inventory changes of the books once they are committed."""
+    book_ids = set(book_ids)
+    if book_ids:
+        # A failed notification must not fail the committed request.
+        transaction.on_commit(
+            lambda: inventory_events.publish(book_ids),
+            using=using,
+            robust=True,
+        )
@@ -0,0 +1,149 @@
+import csv
+import json
+
+from django.db import transaction
+from django.db.models import F
+
+from library.cache import invalidate_catalog
+from library.events import publish_inventory
+from library.models import Book
+from library.serializers import BookSerializer
+
+IMPORT_FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 1000
+
+
+def guess_format(name: str) -> str:
+    return "jsonl" if name.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def read_rows(file, file_format: str):
+    """
+    Yield ``(line, row, error)`` from a CSV or JSON Lines text stream.
+
+    A stream that cannot be decoded or parsed further ends with an error
+    for the line it stopped at; the rows before it are kept.
+    """
+    line = 0
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                line = reader.line_num
+                yield line, row, None
+            return
+
+        for line, text in enumerate(file, 1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as error:
+                yield line, text, {
+                    "non_field_errors": [f"Invalid JSON: {error}"]
+                }
+                continue
+            if not isinstance(row, dict):
+                yield line, row, {"non_field_errors": ["Expected an object"]}
+                continue
+            yield line, row, None
+    except (UnicodeDecodeError, csv.Error) as error:
+        yield line + 1, None, {"non_field_errors": [f"Unreadable: {error}"]}
+
+
+class BookImporter:
+    """
+    Upsert books from a stream of rows in batches.
+
+    Every row is validated with ``BookSerializer``. Valid rows are
+    grouped by ``(title, author)``; matches add their inventory to the
+    existing book and replace its fee and cover, the rest are inserted.
+    Each batch costs one lookup, one bulk insert and one bulk update in
+    a single transaction.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        on_error=None,
+        on_progress=None,
+    ) -> None:
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+
+    def run(self, rows) -> "BookImporter":
+        batch = []
+        for line, row, error in rows:
+            self.processed += 1
+            if error is None:
+                serializer = BookSerializer(data=row)
+                if serializer.is_valid():
+                    batch.append(serializer.validated_data)
+                else:
+                    error = serializer.errors
+
+            if error is not None:
+                self.failed += 1
+                if self.on_error:
+                    self.on_error(line, row, error)
+
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+
+        if batch:
+            self.flush(batch)
+        return self
+
+    def flush(self, batch: list) -> None:
+        merged = {}
+        for item in batch:
+            key = (item["title"], item["author"])
+            if key in merged:
+                inventory = merged[key]["inventory"] + item["inventory"]
+                merged[key].update(item, inventory=inventory)
+            else:
+                merged[key] = dict(item)
+
+        with transaction.atomic():
+            existing = {
+                (book.title, book.author): book
+                for book in Book.objects.filter(
+                    title__in={title for title, _ in merged}
+                ).only("id", "title", "author", "cover")
+            }
+            new_books, updated_books = [], []
+            for key, item in merged.items():
+                book = existing.get(key)
+                if book is None:
+                    new_books.append(Book(**item))
+                    continue
+                book.inventory = F("inventory") + item["inventory"]
+                book.daily_fee = item["daily_fee"]
+                book.cover = item.get("cover", book.cover)
+                updated_books.append(book)
+
+            Book.objects.bulk_create(new_books)
+            Book.objects.bulk_update(
+                updated_books, ["inventory", "daily_fee", "cover"]
+            )
+            invalidate_catalog()
+            publish_inventory(book.pk for book in updated_books)
+
+        self.created += len(new_books)
+        self.updated += len(updated_books)
+        if self.on_progress:
+            self.on_progress(self)
+
+    def summary(self) -> dict:
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+        }
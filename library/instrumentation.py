@@ -0,0 +1,90 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Timings collected while a request is being handled."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.spans = {}
+        self.active_spans = set()
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def add_span(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection) -> None:
+    """
+    Record the statements run on ``connection`` into the current request.
+
+    The wrapper stays installed for the life of the connection and finds
+    the request through a context variable, so it also sees queries the
+    async ORM runs in worker threads. It goes first in the wrapper list
+    so ``execute_wrapper()`` blocks keep removing their own wrapper.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def start_request() -> tuple:
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token) -> None:
+    _current.reset(token)
+
+
+def current_metrics() -> RequestMetrics | None:
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Add the time spent in the block to the ``name`` span of the request.
+
+    Nested blocks of the same span are only counted once, and nothing is
+    measured outside of a request.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics.active_spans:
+        yield
+        return
+
+    metrics.active_spans.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active_spans.discard(name)
+        metrics.add_span(name, time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` time towards the serializer span."""
+
+    def to_representation(self, instance):
+        with timed("serializer"):
+            return super().to_representation(instance)
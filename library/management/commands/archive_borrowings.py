@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from library.archive import archive_borrowings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move borrowings returned more than --days days ago from the live "
+        "table to the archive in batches. Meant to be run periodically, "
+        "e.g. from cron."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.BORROWING_ARCHIVE_AFTER_DAYS,
+            help="Archive borrowings returned more than this many days ago",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        if options["days"] < 0:
+            raise CommandError("--days can't be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        returned_before = date.today() - timedelta(
+            days=options["days"]
+        )
+        archived = archive_borrowings(returned_before, options["batch_size"])
+
+        self.stdout.write(
+            f"Archived {archived} borrowings returned before "
+            f"{returned_before}"
+        )
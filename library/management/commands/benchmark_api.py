@@ -0,0 +1,132 @@
+import json
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from library.benchmark import SCENARIOS, compare, run_scenario
+from library.models import Book
+
+BENCH_PASSWORD = "bench-password"
+HOT_TITLE = "Benchmark hot title"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the HTTP load benchmark against a running server that uses "
+        "the same database."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--base-url", default="http://127.0.0.1:8000"
+        )
+        parser.add_argument(
+            "--scenarios",
+            nargs="+",
+            choices=tuple(SCENARIOS),
+            default=tuple(SCENARIOS),
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to run each scenario",
+        )
+        parser.add_argument(
+            "--hot-books",
+            type=int,
+            default=3,
+            help="Number of titles shared by all checkout workers",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--label",
+            help="Name of the deployment under test(ex. wsgi, asgi)",
+        )
+        parser.add_argument("--output", help="Write results to this JSON file")
+        parser.add_argument(
+            "--compare", help="Previous results file to compare against"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["concurrency"] < 1 or options["hot_books"] < 1:
+            raise CommandError(
+                "--concurrency and --hot-books must be positive"
+            )
+
+        context = self.prepare(options["concurrency"], options["hot_books"])
+        results = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": options["base_url"],
+            "label": options["label"],
+            "concurrency": options["concurrency"],
+            "duration": options["duration"],
+            "scenarios": {},
+        }
+
+        for name in options["scenarios"]:
+            try:
+                result = run_scenario(
+                    name,
+                    options["base_url"],
+                    context,
+                    concurrency=options["concurrency"],
+                    duration=options["duration"],
+                    seed=options["seed"],
+                )
+            except RuntimeError as error:
+                raise CommandError(error)
+            results["scenarios"][name] = result
+            self.report(name, result)
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                results["compared_to"] = compare(json.load(file), results)
+            for name, change in results["compared_to"].items():
+                self.stdout.write(
+                    f"{name}: req/s {change['requests_per_second']}%, "
+                    f"p95 {change['p95']}%"
+                )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def prepare(self, concurrency: int, hot_books: int) -> dict:
+        user_model = get_user_model()
+        users = []
+        for index in range(concurrency):
+            email = f"bench{index}@load.test"
+            user, created = user_model.objects.get_or_create(email=email)
+            if created:
+                user.set_password(BENCH_PASSWORD)
+                user.save()
+            users.append(email)
+
+        hot = []
+        for index in range(hot_books):
+            book, _ = Book.objects.update_or_create(
+                title=f"{HOT_TITLE} {index}",
+                author="Benchmark",
+                defaults={"inventory": concurrency * 10, "daily_fee": 1},
+            )
+            hot.append(book.id)
+
+        return {
+            "users": users,
+            "password": BENCH_PASSWORD,
+            "hot_books": hot,
+            "books": Book.objects.count(),
+        }
+
+    def report(self, name: str, result: dict) -> None:
+        latency = result["latency_ms"]
+        self.stdout.write(
+            f"{name}: {result['requests_per_second']} req/s, "
+            f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+            f"p99 {latency['p99']} ms, "
+            f"errors {result['errors']}/{result['requests']}, "
+            f"sql/request {result['sql_queries_per_request']}"
+        )
@@ -0,0 +1,256 @@
+import random
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from library.cache import invalidate_borrowings, invalidate_catalog
+from library.models import Book, Borrowing
+from library.summary import rebuild_summaries
+
+EMAIL_DOMAIN = "load.test"
+WORDS = (
+    "Shadow", "River", "Night", "Garden", "Stone", "Winter", "Silent",
+    "Golden", "Forest", "Storm", "Letters", "Empire", "Glass", "Harbor",
+    "Crown", "Ashes", "Dream", "Kingdom", "Orchard", "Voyage", "Lantern",
+    "Mirror", "Steppe", "Song", "Fire", "Island", "Memory", "Wolf",
+)
+FIRST_NAMES = (
+    "Taras", "Lesya", "Ivan", "Olena", "George", "Maria", "Serhiy",
+    "Anna", "Mykola", "Sofia", "Andriy", "Iryna", "Oksana", "Petro",
+)
+LAST_NAMES = (
+    "Shevchenko", "Ukrainka", "Franko", "Orwell", "Zhadan", "Kostenko",
+    "Stus", "Andrukhovych", "Kobylianska", "Khvylovy", "Pidmohylny",
+)
+
+
+BORROWING_FIELDS = (
+    "book_id",
+    "user_id",
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+)
+
+
+def insert_borrowings(rows: list) -> None:
+    """
+    Insert borrowings given as tuples of ``BORROWING_FIELDS`` values.
+
+    The rows are inserted directly, as ``bulk_create`` would replace the
+    generated borrow dates with today's (``auto_now_add``).
+    """
+    fields = [Borrowing._meta.get_field(name) for name in BORROWING_FIELDS]
+    quote_name = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_name(Borrowing._meta.db_table),
+        ", ".join(quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [
+                    field.get_db_prep_value(value, connection)
+                    for field, value in zip(fields, row)
+                ]
+                for row in rows
+            ],
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, books and borrowings with realistic "
+        "distributions for load testing."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--books", type=int, default=10000)
+        parser.add_argument("--borrowings", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=3,
+            help="How far back borrow dates are spread",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=3.0,
+            help="Popularity skew; 1 is uniform, higher favours hot titles",
+        )
+        parser.add_argument(
+            "--overdue-share",
+            type=float,
+            default=0.05,
+            help="Share of past-due borrowings that are still not returned",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["chunk_size"] < 1 or options["skew"] < 1:
+            raise CommandError("--chunk-size and --skew must be at least 1")
+
+        self.random = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+
+        user_ids = self.generate_users(options["users"], options["seed"])
+        book_ids = self.generate_books(options["books"])
+        if options["borrowings"] and not (user_ids and book_ids):
+            raise CommandError("Borrowings need at least one user and book")
+        self.generate_borrowings(
+            options["borrowings"],
+            user_ids,
+            book_ids,
+            years=options["years"],
+            skew=options["skew"],
+            overdue_share=options["overdue_share"],
+        )
+        self.take_loaned_copies(book_ids)
+        # The raw inserts skip the signals that keep these up to date.
+        invalidate_catalog()
+        if options["borrowings"]:
+            invalidate_borrowings(user_ids)
+            for chunk in self.chunks(len(user_ids)):
+                rebuild_summaries(user_ids[chunk.start:chunk.stop])
+
+    def chunks(self, total: int):
+        for start in range(0, total, self.chunk_size):
+            yield range(start, min(start + self.chunk_size, total))
+
+    def report(self, name: str, done: int, total: int) -> None:
+        self.stdout.write(f"{name}: {done}/{total}")
+
+    def generate_users(self, total: int, seed: int) -> array:
+        user_model = get_user_model()
+        # Hashing once keeps generation fast; every user gets "password".
+        password = make_password("password")
+        suffix = f".{seed}@{EMAIL_DOMAIN}"
+
+        for chunk in self.chunks(total):
+            user_model.objects.bulk_create(
+                (
+                    user_model(
+                        email=f"user{index}{suffix}",
+                        password=password,
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                    )
+                    for index in chunk
+                ),
+                ignore_conflicts=True,
+            )
+            self.report("Users", chunk.stop, total)
+
+        return array(
+            "q",
+            user_model.objects.filter(email__endswith=suffix)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator(),
+        )
+
+    def generate_books(self, total: int) -> array:
+        book_ids = array("q")
+        for chunk in self.chunks(total):
+            with transaction.atomic():
+                books = Book.objects.bulk_create(
+                    self.make_book() for _ in chunk
+                )
+            book_ids.extend(book.id for book in books)
+            self.report("Books", chunk.stop, total)
+        return book_ids
+
+    def make_book(self) -> Book:
+        words = self.random.sample(WORDS, self.random.randint(1, 4))
+        return Book(
+            title=" ".join(words),
+            author=(
+                f"{self.random.choice(FIRST_NAMES)} "
+                f"{self.random.choice(LAST_NAMES)}"
+            ),
+            inventory=self.random.randint(0, 12),
+            daily_fee=Decimal(self.random.randint(10, 500)) / 100,
+            cover=self.random.choice(("HARD", "SOFT")),
+        )
+
+    def generate_borrowings(
+        self,
+        total: int,
+        user_ids: array,
+        book_ids: array,
+        years: int,
+        skew: float,
+        overdue_share: float,
+    ) -> None:
+        today = date.today()
+        days = max(years * 365, 1)
+
+        for chunk in self.chunks(total):
+            rows = []
+            for _ in chunk:
+                # u ** skew piles indices near 0, so a few titles
+                # take most loans, like real bestsellers.
+                position = self.random.random() ** skew
+                book_id = book_ids[int(position * len(book_ids))]
+                borrow_date = today - timedelta(
+                    days=self.random.randrange(days)
+                )
+                expected = borrow_date + timedelta(
+                    days=self.random.randint(7, 30)
+                )
+                actual = None
+                if expected < today and self.random.random() >= overdue_share:
+                    actual = min(
+                        borrow_date
+                        + timedelta(days=self.random.randint(1, 40)),
+                        today,
+                    )
+                rows.append(
+                    (
+                        book_id,
+                        self.random.choice(user_ids),
+                        borrow_date,
+                        expected,
+                        actual,
+                    )
+                )
+            with transaction.atomic():
+                insert_borrowings(rows)
+            self.report("Borrowings", chunk.stop, total)
+
+    def take_loaned_copies(self, book_ids: array) -> None:
+        """
+        Subtract the copies out on active loans from the inventory.
+
+        Generated inventories count every copy of a book; titles with
+        more active loans than copies end up out of stock.
+        """
+        loaned = (
+            Borrowing.objects.filter(
+                book=OuterRef("pk"), actual_return_date=None
+            )
+            .order_by()
+            .values("book")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        for chunk in self.chunks(len(book_ids)):
+            Book.objects.filter(
+                pk__in=book_ids[chunk.start:chunk.stop]
+            ).update(
+                inventory=Greatest(
+                    F("inventory") - Coalesce(Subquery(loaned), 0), 0
+                )
+            )
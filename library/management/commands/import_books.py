@@ -0,0 +1,82 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importer import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    BookImporter,
+    guess_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Upsert books from a CSV or JSON Lines file in batches."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path", help="CSV or JSON Lines file to import")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format, guessed from the extension by default",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--errors",
+            help="Where to write rejected rows (default: <path>.errors.jsonl)",
+        )
+
+    def handle(self, *args, **options) -> None:
+        path = options["path"]
+        file_format = options["format"] or guess_format(path)
+        errors_path = options["errors"] or f"{path}.errors.jsonl"
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        try:
+            source = open(path, encoding="utf-8-sig", newline="")
+        except OSError as error:
+            raise CommandError(error)
+
+        with source, open(errors_path, "w", encoding="utf-8") as errors:
+
+            def on_error(line, row, error) -> None:
+                errors.write(
+                    json.dumps({"line": line, "row": row, "errors": error})
+                    + "\n"
+                )
+
+            def on_progress(importer) -> None:
+                self.stdout.write(
+                    "Processed {processed} rows: {created} created, "
+                    "{updated} updated, {failed} failed".format(
+                        **importer.summary()
+                    )
+                )
+
+            importer = BookImporter(
+                batch_size=options["batch_size"],
+                on_error=on_error,
+                on_progress=on_progress,
+            ).run(read_rows(source, file_format))
+
+        if importer.failed:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{importer.failed} rows rejected, see {errors_path}"
+                )
+            )
+        else:
+            os.remove(errors_path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported {processed} rows: {created} created, "
+                "{updated} updated, {failed} failed".format(
+                    **importer.summary()
+                )
+            )
+        )
@@ -0,0 +1,259 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Every process keeps its counters and histograms in memory. When
+``METRICS_DIR`` is set (one directory shared by all gunicorn workers),
+each process also dumps them to ``metrics-<pid>.json`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds, and a scrape served by any worker
+sums the files of all workers. Files of exited workers are kept so
+counters never go backwards; clear the directory on deploy.
+
+``library.views.metrics_view`` serves scrapes to staff users and, when
+``METRICS_TOKEN`` is configured, to ``Authorization: Bearer <token>``.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from glob import glob
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    "library_http_requests_total": (
+        "counter", "HTTP requests by route, method and status.", None
+    ),
+    "library_http_request_duration_seconds": (
+        "histogram", "HTTP request latency by route and method.",
+        LATENCY_BUCKETS,
+    ),
+    "library_db_queries_total": (
+        "counter", "SQL statements executed by route and method.", None
+    ),
+    "library_db_duration_seconds": (
+        "histogram", "Database time per request by route and method.",
+        DB_BUCKETS,
+    ),
+    "library_cache_requests_total": (
+        "counter", "Response cache lookups by cache and result.", None
+    ),
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.values = {}
+        self.loaded = False
+        self.last_flush = 0.0
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                # Per-bucket counts, then the overflow bucket, sum, count.
+                data = self.values[key] = [0] * (len(buckets) + 3)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            else:
+                data[len(buckets)] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def path(self) -> str | None:
+        if not settings.METRICS_DIR:
+            return None
+        return os.path.join(
+            settings.METRICS_DIR, f"metrics-{os.getpid()}.json"
+        )
+
+    def load(self) -> None:
+        """Continue from a previous dump of a process with the same pid."""
+        self.loaded = True
+        path = self.path()
+        if path and os.path.exists(path):
+            previous = read_dump(path)
+            with self.lock:
+                for key, value in previous.items():
+                    self.values[key] = merge(self.values.get(key), value)
+
+    def dump(self) -> list:
+        with self.lock:
+            return self.entries()
+
+    def entries(self) -> list:
+        return [
+            [name, list(labels), value]
+            for (name, labels), value in self.values.items()
+        ]
+
+    def flush_due(self) -> bool:
+        return bool(self.path()) and (
+            time.monotonic() - self.last_flush
+            >= settings.METRICS_FLUSH_INTERVAL
+        )
+
+    def flush(self, force: bool = False) -> None:
+        path = self.path()
+        if not path:
+            return
+        # Threads of one process share the file; only one writes at a time,
+        # while ``inc`` and ``observe`` only wait for the snapshot.
+        with self.flush_lock:
+            if not force and not self.flush_due():
+                return
+            if not self.loaded:
+                self.load()
+            self.last_flush = time.monotonic()
+            entries = self.dump()
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=os.path.dirname(path),
+                prefix=f"{os.path.basename(path)}.",
+                suffix=".tmp",
+                delete=False,
+            ) as file:
+                json.dump(entries, file)
+            try:
+                os.replace(file.name, path)
+            except OSError:
+                os.unlink(file.name)
+                raise
+
+    def collect(self) -> dict:
+        """Merge the values of every worker process."""
+        self.flush(force=True)
+        path = self.path()
+        if not path:
+            return {
+                (name, tuple(tuple(label) for label in labels)): value
+                for name, labels, value in self.dump()
+            }
+
+        values = {}
+        pattern = os.path.join(settings.METRICS_DIR, "metrics-*.json")
+        for dump in glob(pattern):
+            for key, value in read_dump(dump).items():
+                values[key] = merge(values.get(key), value)
+        return values
+
+
+def read_dump(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            entries = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return {
+        (name, tuple(tuple(label) for label in labels)): value
+        for name, labels, value in entries
+    }
+
+
+def merge(current, value):
+    if current is None:
+        return list(value) if isinstance(value, list) else value
+    if isinstance(value, list):
+        return [left + right for left, right in zip(current, value)]
+    return current + value
+
+
+registry = Registry()
+
+
+def escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels, extra: tuple = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return (
+        "{" + ",".join(f'{key}="{escape(val)}"' for key, val in pairs) + "}"
+    )
+
+
+def format_number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(values: dict, gauges: dict) -> str:
+    lines = []
+    by_name = {}
+    for (name, labels), value in sorted(values.items()):
+        by_name.setdefault(name, []).append((labels, value))
+
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in by_name.get(name, ()):
+            if kind == "counter":
+                lines.append(
+                    f"{name}{format_labels(labels)} {format_number(value)}"
+                )
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), value):
+                cumulative += count
+                bucket_labels = format_labels(labels, (("le", bound),))
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{name}_sum{format_labels(labels)} {format_number(value[-2])}"
+            )
+            lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+
+    for name, (description, value) in gauges.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def business_gauges() -> dict:
+    from datetime import date
+
+    from library.models import Book, Borrowing
+
+    active = Borrowing.objects.filter(actual_return_date=None)
+    return {
+        "library_active_borrowings": (
+            "Borrowings that are not returned yet.",
+            active.count(),
+        ),
+        "library_overdue_borrowings": (
+            "Active borrowings past their expected return date.",
+            active.filter(expected_return_date__lt=date.today()).count(),
+        ),
+        "library_books_out_of_stock": (
+            "Books with zero inventory.",
+            Book.objects.filter(inventory=0).count(),
+        ),
+    }
@@ -0,0 +1,259 @@
+import json
+import logging
+import random
+import time
+from hashlib import md5
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from library.instrumentation import (
+    current_metrics,
+    finish_request,
+    start_request,
+)
+from library.metrics import registry
+from library.routers import finish_routing, start_routing
+
+logger = logging.getLogger("library.performance")
+
+
+def view_name(view_func, method: str) -> str:
+    """Name a view like ``BorrowingViewSet.return_book``."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+def request_view_name(request) -> str | None:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    return view_name(match.func, request.method.lower())
+
+
+class RequestMiddleware:
+    """
+    Base for middleware usable in both sync and async stacks.
+
+    Under ASGI a sync-only middleware would move every request, and the
+    async views behind it, through a worker thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+class MetricsMiddleware(RequestMiddleware):
+    """
+    Count every request in the Prometheus metrics of ``library.metrics``.
+
+    Requests are labelled with the view name rather than the path, so the
+    number of series stays bounded; unresolved URLs count as
+    ``unmatched``.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        self.record(request, response, metrics)
+        registry.flush()
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        self.record(request, response, metrics)
+        # Keep the file write off the event loop.
+        if registry.flush_due():
+            await sync_to_async(registry.flush, thread_sensitive=False)()
+        return response
+
+    def record(self, request, response, metrics) -> None:
+        total = time.perf_counter() - metrics.started
+        route = request_view_name(request) or "unmatched"
+        labels = {"route": route, "method": request.method}
+        registry.inc(
+            "library_http_requests_total",
+            status=str(response.status_code),
+            **labels,
+        )
+        registry.observe(
+            "library_http_request_duration_seconds", total, **labels
+        )
+        registry.inc("library_db_queries_total", metrics.queries, **labels)
+        registry.observe(
+            "library_db_duration_seconds", metrics.db_time, **labels
+        )
+
+
+class ServerTimingMiddleware(RequestMiddleware):
+    """
+    Measure sampled requests and report them in ``Server-Timing``.
+
+    A share of requests set by ``SERVER_TIMING_SAMPLE_RATE`` records wall
+    time, database time and statement count (through connection execute
+    wrappers, so DEBUG is not needed), serializer time and response size.
+    Results go to the response headers and to one JSON log line on the
+    ``library.performance`` logger. Unsampled requests pay one random().
+    When ``MetricsMiddleware`` runs first, its measurements are reused.
+    """
+
+    def __init__(self, get_response) -> None:
+        super().__init__(get_response)
+        self.sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+
+    def sampled(self) -> bool:
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics, token = current_metrics(), None
+        if metrics is None:
+            metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                finish_request(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics, token = current_metrics(), None
+        if metrics is None:
+            metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                finish_request(token)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+
+        size = None
+        if not response.streaming:
+            size = len(response.content)
+
+        timings = [f"app;dur={total * 1000:.2f}"]
+        timings.append(f"db;dur={metrics.db_time * 1000:.2f}")
+        timings.append(f"sql;desc={metrics.queries}")
+        for name, seconds in metrics.spans.items():
+            timings.append(f"{name};dur={seconds * 1000:.2f}")
+        response["Server-Timing"] = ", ".join(timings)
+
+        logger.info(
+            json.dumps(
+                {
+                    "view": request_view_name(request),
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(total * 1000, 2),
+                    "db_ms": round(metrics.db_time * 1000, 2),
+                    "queries": metrics.queries,
+                    **{
+                        f"{name}_ms": round(seconds * 1000, 2)
+                        for name, seconds in metrics.spans.items()
+                    },
+                    "response_bytes": size,
+                }
+            )
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware(RequestMiddleware):
+    """
+    Let safe-method requests read from the database replicas.
+
+    After a successful write a client is pinned to the primary for
+    ``REPLICA_PIN_SECONDS`` so it reads its own writes despite
+    replication lag: by a cookie, and by its ``Authorization`` header in
+    the cache for clients that ignore cookies.
+    """
+
+    pin_cookie = "db_primary"
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        routing, token = start_routing(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_routing(token)
+        return self.pin(request, response, routing)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        routing, token = start_routing(self.use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_routing(token)
+        return self.pin(request, response, routing)
+
+    @staticmethod
+    def pin_key(request) -> str | None:
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            return None
+        return f"library:db_primary:{md5(authorization.encode()).hexdigest()}"
+
+    def use_replica(self, request) -> bool:
+        if request.method not in SAFE_METHODS:
+            return False
+        if self.pin_cookie in request.COOKIES:
+            return False
+        key = self.pin_key(request)
+        return key is None or cache.get(key) is None
+
+    def pin(self, request, response, routing):
+        wrote = routing.wrote or request.method not in SAFE_METHODS
+        if not wrote or response.status_code >= 400:
+            return response
+
+        seconds = settings.REPLICA_PIN_SECONDS
+        key = self.pin_key(request)
+        if key is not None:
+            cache.set(key, True, seconds)
+        response.set_cookie(
+            self.pin_cookie, "1", max_age=seconds, httponly=True
+        )
+        return response
@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# Triggers live on library_book, so a migration that makes Django rebuild
+# that table on SQLite must recreate them.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(
+        title,
+        author,
+        content='library_book',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book
+    BEGIN
+        INSERT INTO library_book_fts(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book
+    BEGIN
+        INSERT INTO library_book_fts(library_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update
+    AFTER UPDATE OF title, author ON library_book
+    BEGIN
+        INSERT INTO library_book_fts(library_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO library_book_fts(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    "INSERT INTO library_book_fts(library_book_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS library_book_fts_insert",
+    "DROP TRIGGER IF EXISTS library_book_fts_delete",
+    "DROP TRIGGER IF EXISTS library_book_fts_update",
+    "DROP TABLE IF EXISTS library_book_fts",
+]
+
+POSTGRESQL_INDEX = "library_book_search_idx"
+
+
+def create_search_index(apps, schema_editor) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        Book = apps.get_model("library", "Book")
+        schema_editor.add_index(
+            Book,
+            GinIndex(
+                SearchVector("title", "author", config="simple"),
+                name=POSTGRESQL_INDEX,
+            ),
+        )
+
+
+def drop_search_index(apps, schema_editor) -> None:
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_REVERSE:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRESQL_INDEX}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0008_alter_book_daily_fee_alter_book_inventory"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'author', 'id'], name='library_book_title_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['-borrow_date', '-id'], name='library_borrowing_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['user', '-borrow_date', '-id'], name='library_borrowing_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('actual_return_date', None)), fields=['user', '-borrow_date', '-id'], name='library_borrowing_active_idx'),
+        ),
+    ]
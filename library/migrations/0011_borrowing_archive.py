@@ -0,0 +1,64 @@
+# Generated by Django 4.2.3 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Read by the unmanaged BorrowingHistory model. SQLite refuses to rename
+# a table a view depends on, so a migration that makes Django rebuild
+# library_borrowing or library_archivedborrowing there must drop the view
+# first and create it again afterwards.
+CREATE_HISTORY_VIEW = """
+CREATE VIEW library_borrowing_history AS
+SELECT id, borrow_date, expected_return_date, actual_return_date,
+       book_id, user_id
+FROM library_borrowing
+UNION ALL
+SELECT id, borrow_date, expected_return_date, actual_return_date,
+       book_id, user_id
+FROM library_archivedborrowing
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0010_borrowing_and_book_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorrowingHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('borrow_date', models.DateField()),
+                ('expected_return_date', models.DateField()),
+                ('actual_return_date', models.DateField(null=True)),
+            ],
+            options={
+                'db_table': 'library_borrowing_history',
+                'ordering': ['-borrow_date'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBorrowing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('borrow_date', models.DateField()),
+                ('expected_return_date', models.DateField()),
+                ('actual_return_date', models.DateField()),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_borrowings', to='library.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_borrowings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-borrow_date'],
+                'indexes': [models.Index(fields=['-borrow_date', '-id'], name='library_archived_date_idx'), models.Index(fields=['user', '-borrow_date', '-id'], name='library_archived_user_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            CREATE_HISTORY_VIEW,
+            "DROP VIEW IF EXISTS library_borrowing_history",
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.3 on 2026-10-18 06:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_auto_20230728_1111'),
+        ('library', '0011_borrowing_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorrowingSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='borrowing_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_loans', models.JSONField(default=list)),
+                ('late_fees', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+            ],
+        ),
+    ]
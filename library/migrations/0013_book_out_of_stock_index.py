@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0012_borrowing_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('inventory', 0)), fields=['id'], name='library_book_out_of_stock_idx'),
+        ),
+    ]
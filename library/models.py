@@ -1,6 +1,73 @@
+from datetime import date
+from decimal import Decimal
+
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+
+from library.cache import invalidate_catalog
+from library.events import publish_inventory
+
+
+class BookQuerySet(models.QuerySet):
+    def reserve(self, book_id: int) -> bool:
+        """Take one copy of the book in a single conditional UPDATE."""
+        reserved = self.filter(pk=book_id, inventory__gt=0).update(
+            inventory=F("inventory") - 1
+        )
+        if reserved:
+            invalidate_catalog(self.db)
+            publish_inventory([book_id], self.db)
+        return bool(reserved)
+
+    def reserve_many(self, demand: dict) -> int:
+        """
+        Take copies of several books in one guarded UPDATE.
+
+        ``demand`` maps book ids to the number of copies wanted. Returns
+        the number of books that had enough copies and were updated.
+        """
+        condition = Q()
+        for book_id, count in demand.items():
+            condition |= Q(pk=book_id, inventory__gte=count)
+        invalidate_catalog(self.db)
+        publish_inventory(demand, self.db)
+        return self.filter(condition).update(
+            inventory=Case(
+                *(
+                    When(pk=book_id, then=F("inventory") - count)
+                    for book_id, count in demand.items()
+                ),
+                default=F("inventory"),
+            )
+        )
+
+    def release(self, book_id: int, count: int = 1) -> int:
+        """Put copies of the book back in a single UPDATE."""
+        invalidate_catalog(self.db)
+        publish_inventory([book_id], self.db)
+        return self.filter(pk=book_id).update(
+            inventory=F("inventory") + count
+        )
+
+    def release_many(self, returned: dict) -> int:
+        """
+        Put copies of several books back in one UPDATE.
+
+        ``returned`` maps book ids to the number of copies returned.
+        """
+        invalidate_catalog(self.db)
+        publish_inventory(returned, self.db)
+        return self.filter(pk__in=returned).update(
+            inventory=Case(
+                *(
+                    When(pk=book_id, then=F("inventory") + count)
+                    for book_id, count in returned.items()
+                ),
+                default=F("inventory"),
+            )
+        )
 
 
 class Book(models.Model):
@@ -17,13 +84,57 @@ class Book(models.Model):
         max_length=60, choices=cover_choices, default="SOFT"
     )
 
+    objects = BookQuerySet.as_manager()
+
     class Meta:
         ordering = ["title", "author"]
+        indexes = [
+            models.Index(
+                fields=["title", "author", "id"],
+                name="library_book_title_author_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(inventory=0),
+                name="library_book_out_of_stock_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
 
+class BorrowingQuerySet(models.QuerySet):
+    def return_many(self, active: dict, today: date) -> dict:
+        """
+        Mark borrowings returned, keeping those no one returned first.
+
+        ``active`` maps borrowing ids to any data of the caller; the
+        entries of the borrowings returned here are returned.
+        ``select_for_update`` does nothing on SQLite, so a concurrent
+        return may have won since ``active`` was read. The guarded UPDATE
+        only touches borrowings that are still active; if it changed
+        fewer rows, it is undone and each borrowing is returned on its
+        own to learn which ones were ours.
+        """
+        returning = self.filter(actual_return_date=None)
+        with transaction.atomic(using=self.db):
+            updated = returning.filter(pk__in=active).update(
+                actual_return_date=today
+            )
+            if updated == len(active):
+                return active
+            transaction.set_rollback(True, using=self.db)
+
+        return {
+            borrowing_id: rest
+            for borrowing_id, rest in active.items()
+            if returning.filter(pk=borrowing_id).update(
+                actual_return_date=today
+            )
+        }
+
+
 class Borrowing(models.Model):
     borrow_date = models.DateField(auto_now_add=True)
     expected_return_date = models.DateField()
@@ -35,11 +146,148 @@ class Borrowing(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
 
+    objects = BorrowingQuerySet.as_manager()
+
     class Meta:
         ordering = ["-borrow_date"]
+        indexes = [
+            models.Index(
+                fields=["-borrow_date", "-id"],
+                name="library_borrowing_date_idx",
+            ),
+            models.Index(
+                fields=["user", "-borrow_date", "-id"],
+                name="library_borrowing_user_idx",
+            ),
+            models.Index(
+                fields=["user", "-borrow_date", "-id"],
+                condition=models.Q(actual_return_date=None),
+                name="library_borrowing_active_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
             f"Book: {self.book.title}, "
             f"return date: {self.expected_return_date}"
         )
+
+
+class ArchivedBorrowing(models.Model):
+    """
+    Borrowing returned long ago, moved out of the live table.
+
+    Rows keep the id they had in ``Borrowing``; see
+    ``library.archive.archive_borrowings``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    borrow_date = models.DateField()
+    expected_return_date = models.DateField()
+    actual_return_date = models.DateField()
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="archived_borrowings"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_borrowings",
+    )
+
+    class Meta:
+        ordering = ["-borrow_date"]
+        indexes = [
+            models.Index(
+                fields=["-borrow_date", "-id"],
+                name="library_archived_date_idx",
+            ),
+            models.Index(
+                fields=["user", "-borrow_date", "-id"],
+                name="library_archived_user_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"Book: {self.book.title}, "
+            f"returned: {self.actual_return_date}"
+        )
+
+
+class BorrowingHistory(models.Model):
+    """
+    Live and archived borrowings together, read through a database view.
+
+    The view is a ``UNION ALL`` of both tables, so filters, ordering and
+    limits are pushed down to each table's indexes. Read only.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    borrow_date = models.DateField()
+    expected_return_date = models.DateField()
+    actual_return_date = models.DateField(null=True)
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "library_borrowing_history"
+        ordering = ["-borrow_date"]
+
+    def __str__(self) -> str:
+        return (
+            f"Book: {self.book.title}, "
+            f"return date: {self.expected_return_date}"
+        )
+
+
+class BorrowingSummary(models.Model):
+    """
+    Per-user borrowing totals kept up to date by the borrowing flows.
+
+    ``active_loans`` holds ``{"id", "due", "fee"}`` of every active
+    borrowing ordered by due date, and ``late_fees`` the fees of late
+    returns, so overdue counts and fees can be computed for any day from
+    this row alone. See ``library.summary``.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="borrowing_summary",
+    )
+    active_loans = models.JSONField(default=list)
+    late_fees = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0
+    )
+
+    def report(self, today: date = None) -> dict:
+        today = today or date.today()
+        dues = [
+            (date.fromisoformat(loan["due"]), Decimal(loan["fee"]))
+            for loan in self.active_loans
+        ]
+        overdue = [(due, fee) for due, fee in dues if due < today]
+        return {
+            "active": len(dues),
+            "overdue": len(overdue),
+            "accrued_fees": self.late_fees
+            + sum(fee * (today - due).days for due, fee in overdue),
+            "next_due_date": next(
+                (due for due, _ in dues if due >= today), None
+            ),
+        }
+
+    def __str__(self) -> str:
+        return f"Borrowings of user {self.user_id}"
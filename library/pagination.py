@@ -0,0 +1,152 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with an opt-in keyset mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches to keyset
+    pagination over the view's ``keyset_ordering``. Each page filters on
+    the last row of the previous one instead of skipping rows, and no
+    count query is run, so every page costs the same as the first.
+    The ordering must end with a unique field to break ties.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = (
+        "Keyset pagination cursor; pass an empty value for the first page."
+    )
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset = self.keyset_queryset(queryset, request, view)
+        return self.keyset_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` running its queries on the async ORM."""
+        self.keyset = self.cursor_query_param in request.query_params
+        if self.keyset:
+            queryset = self.keyset_queryset(queryset, request, view)
+            return self.keyset_page([row async for row in queryset])
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count == 0 or self.offset > self.count:
+            return []
+        page = queryset[self.offset : self.offset + self.limit]
+        return [row async for row in page]
+
+    def keyset_queryset(self, queryset, request, view):
+        self.request = request
+        self.ordering = view.keyset_ordering
+        self.limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset[: self.limit + 1]
+
+    def keyset_page(self, results: list) -> list:
+        self.next_position = None
+        if len(results) > self.limit:
+            results = results[: self.limit]
+            self.next_position = [
+                self.get_value(results[-1], field.lstrip("-"))
+                for field in self.ordering
+            ]
+        return results
+
+    @staticmethod
+    def get_value(row, name: str):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, name)
+
+    def after(self, position: list) -> Q:
+        """Build ``(a, b, ...) > (x, y, ...)`` honouring each direction."""
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {
+                self.ordering[i].lstrip("-"): position[i]
+                for i in range(index)
+            }
+            conditions.append(
+                Q(**equal, **{f"{name}__{lookup}": position[index]})
+            )
+
+        first = self.ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        leading = Q(**{f"{first.lstrip('-')}__{bound}": position[0]})
+        return leading & reduce(or_, conditions)
+
+    def decode_cursor(self, request, model) -> list | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position: list) -> str:
+        encoded = json.dumps(position, cls=DjangoJSONEncoder)
+        return urlsafe_b64encode(encoded.encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.next_position)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
@@ -7,3 +8,9 @@ class IsAdminOrReadOnly(BasePermission):
             request.method in SAFE_METHODS
             or (request.user and request.user.is_staff)
         )
+
+
+class HasMetricsToken(BasePermission):
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return bool(token) and request.auth == token
@@ -0,0 +1,95 @@
+"""
+Database routing of reads to replicas.
+
+``ReplicaRoutingMiddleware`` marks safe-method requests as allowed to
+read from ``DATABASE_REPLICAS``; everything else, reads inside
+transactions and reads after a write in the same request use the
+primary. Outside of requests (commands, shell) the primary is used.
+
+Bumping a cache version marks it as recently written for
+``REPLICA_PIN_SECONDS``; a response read from a replica is only treated
+as possibly stale for the versions it depends on that were marked.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing = ContextVar("database_routing", default=None)
+
+
+class RequestRouting:
+    def __init__(self, use_replica: bool) -> None:
+        self.use_replica = use_replica
+        self.wrote = False
+        self.replica_reads = False
+
+
+def start_routing(use_replica: bool) -> tuple:
+    routing = RequestRouting(use_replica)
+    return routing, _routing.set(routing)
+
+
+def finish_routing(token) -> None:
+    _routing.reset(token)
+
+
+def recent_write_key(version_key: str) -> str:
+    return f"{version_key}:recent_write"
+
+
+def mark_recent_writes(version_keys) -> None:
+    """Note that data behind the cache versions changed just now."""
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(
+            {recent_write_key(key): True for key in version_keys},
+            settings.REPLICA_PIN_SECONDS,
+        )
+
+
+def read_may_be_stale(version_keys) -> bool:
+    """
+    Whether this request read from a replica that may lag a recent write
+    to data behind one of the cache versions.
+
+    Such responses must not be cached under the new version, or the
+    stale data would outlive the replication lag. Writes to data behind
+    other versions do not matter.
+    """
+    routing = _routing.get()
+    if routing is None or not routing.replica_reads:
+        return False
+    return bool(
+        cache.get_many([recent_write_key(key) for key in version_keys])
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.use_replica:
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        routing.replica_reads = True
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            # Later reads must see this write.
+            routing.use_replica = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,202 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+from library.instrumentation import timed
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    RelatedField,
+)
+
+
+class RowSerializer:
+    """
+    Render ``values()`` rows in the output format of a ModelSerializer.
+
+    The plan is built once from the serializer's fields: plain columns
+    are copied as they are, other fields only reuse their
+    ``to_representation`` for the value, and nested serializers become
+    joined columns. Only flat sources and single nested serializers are
+    supported.
+    """
+
+    def __init__(self, serializer_class, fields: tuple = None) -> None:
+        self.fields = fields
+        self.columns, self.plan = self.build(serializer_class(), "")
+        self.names = [name for name, _, _ in self.plan]
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_serializer(
+        cls, serializer_class, fields: tuple = None
+    ) -> "RowSerializer":
+        """
+        Cached plan of a serializer, limited to ``fields`` if given.
+
+        ``fields`` must be valid names of the serializer, or the cache
+        would grow with every request.
+        """
+        return cls(serializer_class, fields)
+
+    def build(self, serializer, prefix: str) -> tuple:
+        columns, plan = [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if not prefix and self.fields and name not in self.fields:
+                continue
+            if field.source == "*" or "." in field.source:
+                raise ImproperlyConfigured(
+                    f"Field {name!r} of {type(serializer).__name__} "
+                    f"can't be rendered from values() rows."
+                )
+
+            if isinstance(field, serializers.ListSerializer):
+                raise ImproperlyConfigured(
+                    f"Nested list {name!r} can't be rendered from values()."
+                )
+            if isinstance(field, serializers.BaseSerializer):
+                nested_columns, nested_plan = self.build(
+                    field, f"{prefix}{field.source}__"
+                )
+                columns += nested_columns
+                plan.append((name, nested_columns, nested_plan))
+                continue
+
+            column = f"{prefix}{field.source}"
+            columns.append(column)
+            convert = (
+                None
+                if isinstance(field, IDENTITY_FIELDS)
+                else field.to_representation
+            )
+            plan.append((name, column, convert))
+        return columns, plan
+
+    def render_row(self, plan: list, row: dict) -> dict:
+        data = {}
+        for name, column, convert in plan:
+            if isinstance(column, list):
+                if all(row[nested] is None for nested in column):
+                    data[name] = None
+                else:
+                    data[name] = self.render_row(convert, row)
+                continue
+
+            value = row[column]
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def render(self, rows) -> list:
+        with timed("serializer"):
+            return [self.render_row(self.plan, row) for row in rows]
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from ``values()`` rows instead of model instances.
+
+    Enabled by the ``LIBRARY_FAST_LISTS`` setting; the output matches the
+    view's list serializer byte for byte.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.LIBRARY_FAST_LISTS:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.get_row_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.get_list_columns(rows))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.render(page))
+        return Response(rows.render(queryset))
+
+    def get_row_serializer(self) -> RowSerializer:
+        return RowSerializer.for_serializer(self.get_serializer_class())
+
+    def get_list_columns(self, rows: RowSerializer) -> list:
+        """Rendered columns plus those keyset pagination reads."""
+        columns = list(rows.columns)
+        for field in getattr(self, "keyset_ordering", ()):
+            if field.lstrip("-") not in columns:
+                columns.append(field.lstrip("-"))
+        return columns
+
+
+class SparseFieldsMixin:
+    """
+    Let ``?fields=id,title`` pick the fields of ``list`` and ``retrieve``.
+
+    Only the requested fields are rendered and only their columns are
+    selected: ``values()`` rows for fast lists, ``only()`` otherwise.
+    Related tables are joined only for requested nested fields.
+    Unknown names are rejected.
+    """
+
+    fields_query_param = "fields"
+    sparse_actions = ("list", "retrieve")
+
+    def requested_fields(self) -> tuple | None:
+        if self.action not in self.sparse_actions:
+            return None
+        value = self.request.query_params.get(self.fields_query_param, "")
+        names = {name.strip() for name in value.split(",")} - {""}
+        return tuple(sorted(names)) or None
+
+    def get_sparse_fields(self) -> tuple | None:
+        fields = self.requested_fields()
+        if fields is None:
+            return None
+        available = RowSerializer.for_serializer(
+            self.get_serializer_class()
+        ).names
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError(
+                {
+                    self.fields_query_param: [
+                        f"Unknown fields: {', '.join(unknown)}. "
+                        f"Available: {', '.join(available)}."
+                    ]
+                }
+            )
+        return fields
+
+    def get_row_serializer(self) -> RowSerializer:
+        return RowSerializer.for_serializer(
+            self.get_serializer_class(), self.get_sparse_fields()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fields() is None:
+            return queryset
+
+        columns = self.get_row_serializer().columns
+        if not any("__" in column for column in columns):
+            queryset = queryset.select_related(None)
+        return queryset.only(*columns)
@@ -0,0 +1,101 @@
+import re
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from library.models import Book
+
+FTS_TABLE = "library_book_fts"
+TERM_RE = re.compile(r"\w+")
+
+
+def _terms(value: str | None) -> list[str]:
+    return TERM_RE.findall(value or "")
+
+
+def search_books(
+    queryset: QuerySet,
+    q: str = None,
+    title: str = None,
+    author: str = None,
+) -> QuerySet:
+    """
+    Filter books through the catalog search index.
+
+    ``q`` matches every term as a prefix of a word of the title or
+    author and ranks the results by relevance. ``title`` and ``author``
+    keep matching any substring of their column.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, q, title, author)
+    if vendor == "postgresql":
+        return _search_postgresql(queryset, q, title, author)
+    return _search_fallback(queryset, q, title, author)
+
+
+def _search_sqlite(queryset, q, title, author) -> QuerySet:
+    queryset = _search_fallback(queryset, None, title, author)
+    if not q:
+        return queryset
+    terms = _terms(q)
+    if not terms:
+        return queryset.none()
+
+    match = " AND ".join(f'"{term}"*' for term in terms)
+    book_id = f'"{Book._meta.db_table}"."id"'
+    return (
+        queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [match],
+            )
+        )
+        .annotate(
+            rank=RawSQL(
+                f"SELECT rank FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {book_id}",
+                [match],
+            )
+        )
+        .order_by("rank", "id")
+    )
+
+
+def _search_postgresql(queryset, q, title, author) -> QuerySet:
+    from django.contrib.postgres.search import (
+        SearchQuery,
+        SearchRank,
+        SearchVector,
+    )
+
+    queryset = _search_fallback(queryset, None, title, author)
+    if q:
+        terms = _terms(q)
+        if not terms:
+            return queryset.none()
+        vector = SearchVector("title", "author", config="simple")
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config="simple",
+            search_type="raw",
+        )
+        queryset = (
+            queryset.annotate(search=vector, rank=SearchRank(vector, query))
+            .filter(search=query)
+            .order_by("-rank", "id")
+        )
+    return queryset
+
+
+def _search_fallback(queryset, q, title, author) -> QuerySet:
+    for term in _terms(q):
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(author__icontains=term)
+        )
+    if title:
+        queryset = queryset.filter(title__icontains=title)
+    if author:
+        queryset = queryset.filter(author__icontains=author)
+    return queryset
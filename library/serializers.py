@@ -1,11 +1,16 @@
+from collections import Counter
 from datetime import date
 
+from django.db import transaction
 from rest_framework import serializers
 
+from library.cache import invalidate_borrowings
+from library.instrumentation import TimedSerializerMixin
 from library.models import Book, Borrowing
+from library.summary import record_checkouts, record_extension
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ("id", "title", "author", "cover", "daily_fee", "inventory")
@@ -17,7 +22,17 @@ class BookListSerializer(BookSerializer):
         fields = ("id", "title", "author")
 
 
-class BorrowingSerializer(serializers.ModelSerializer):
+class BookImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=("csv", "jsonl"), required=False
+    )
+    batch_size = serializers.IntegerField(
+        min_value=1, max_value=10000, default=1000
+    )
+
+
+class BorrowingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     def validate(self, attrs):
         data = super(BorrowingSerializer, self).validate(attrs)
         if attrs["book"].inventory == 0:
@@ -31,9 +46,15 @@ class BorrowingSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        borrowing = Borrowing.objects.create(**validated_data)
-        borrowing.book.inventory -= 1
-        borrowing.book.save()
+        book = validated_data["book"]
+        with transaction.atomic():
+            if not Book.objects.reserve(book.id):
+                raise serializers.ValidationError(
+                    "There is no such book available now"
+                )
+            borrowing = Borrowing.objects.create(**validated_data)
+            record_checkouts([borrowing], {book.id: book.daily_fee})
+        book.inventory -= 1
         return borrowing
 
     class Meta:
@@ -41,6 +62,90 @@ class BorrowingSerializer(serializers.ModelSerializer):
         fields = ("id", "expected_return_date", "book")
 
 
+class BorrowingBatchListSerializer(serializers.ListSerializer):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        kwargs.setdefault("max_length", 50)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        books = Book.objects.in_bulk({item["book_id"] for item in items})
+        demand = Counter()
+        errors = []
+
+        for item in items:
+            book_id = item["book_id"]
+            book = books.get(book_id)
+            if book is None:
+                errors.append(
+                    {
+                        "book": [
+                            f'Invalid pk "{book_id}" - object does not exist.'
+                        ]
+                    }
+                )
+                continue
+            demand[book_id] += 1
+            if demand[book_id] > book.inventory:
+                errors.append(
+                    {
+                        "non_field_errors": [
+                            "There is no such book available now"
+                        ]
+                    }
+                )
+                continue
+            errors.append({})
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        self.daily_fees = {
+            book_id: book.daily_fee for book_id, book in books.items()
+        }
+        return items
+
+    def create(self, validated_data):
+        demand = Counter(item["book_id"] for item in validated_data)
+        with transaction.atomic():
+            if Book.objects.reserve_many(demand) != len(demand):
+                raise serializers.ValidationError(
+                    "Some of the books are no longer available"
+                )
+            borrowings = Borrowing.objects.bulk_create(
+                Borrowing(**item) for item in validated_data
+            )
+            invalidate_borrowings(item["user"].id for item in validated_data)
+            record_checkouts(borrowings, self.daily_fees)
+        return borrowings
+
+
+class BorrowingBatchSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    book = serializers.IntegerField(source="book_id")
+
+    def validate(self, attrs):
+        if attrs["expected_return_date"] < date.today():
+            raise serializers.ValidationError(
+                "Return date can't be earlier than today"
+            )
+        return attrs
+
+    class Meta:
+        model = Borrowing
+        fields = ("id", "expected_return_date", "book")
+        list_serializer_class = BorrowingBatchListSerializer
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
 class BorrowingListSerializer(BorrowingSerializer):
     book = BookListSerializer(many=False, read_only=True)
 
@@ -68,7 +173,9 @@ class BorrowingListStaffSerializer(BorrowingListSerializer):
         )
 
 
-class BorrowingDetailSerializer(serializers.ModelSerializer):
+class BorrowingDetailSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     def update(self, instance, validated_data) -> object:
         return_date = validated_data.get(
             "expected_return_date", instance.expected_return_date
@@ -80,7 +187,9 @@ class BorrowingDetailSerializer(serializers.ModelSerializer):
         if instance.actual_return_date:
             raise serializers.ValidationError("Book is already returned")
         instance.expected_return_date = return_date
-        instance.save()
+        with transaction.atomic():
+            instance.save()
+            record_extension(instance)
 
         return instance
 
@@ -88,3 +197,13 @@ class BorrowingDetailSerializer(serializers.ModelSerializer):
         model = Borrowing
         fields = ("id", "expected_return_date", "book")
         read_only_fields = ("book",)
+
+
+class BorrowingSummarySerializer(serializers.Serializer):
+    active = serializers.IntegerField()
+    overdue = serializers.IntegerField()
+    accrued_fees = serializers.DecimalField(max_digits=12, decimal_places=2)
+    next_due_date = serializers.DateField(allow_null=True)
+
+    def to_representation(self, instance):
+        return super().to_representation(instance.report())
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from library.cache import invalidate_borrowings, invalidate_catalog
+from library.database import configure_sqlite
+from library.events import publish_inventory
+from library.instrumentation import install_query_recorder
+from library.models import Book, Borrowing, BorrowingSummary
+from library.summary import rebuild_summaries_on_commit
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_catalog_on_book_change(sender, using, **kwargs) -> None:
+    invalidate_catalog(using)
+
+
+@receiver(post_save, sender=Book)
+def publish_inventory_on_book_save(sender, instance, using, raw, **kwargs):
+    # Admin and API edits of a book
+    if not raw:
+        publish_inventory([instance.pk], using)
+
+
+@receiver(post_save, sender=Borrowing)
+@receiver(post_delete, sender=Borrowing)
+def invalidate_borrowings_on_change(
+    sender, instance, using, **kwargs
+) -> None:
+    invalidate_borrowings([instance.user_id], using)
+
+
+@receiver(post_delete, sender=Borrowing)
+def rebuild_summary_on_borrowing_delete(
+    sender, instance, using, **kwargs
+) -> None:
+    # Also sent for borrowings deleted along with their book.
+    rebuild_summaries_on_commit([instance.user_id], using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_borrowing_summary(sender, instance, created, raw, **kwargs):
+    # Fixtures may be loaded before the summary table exists.
+    if created and not raw:
+        BorrowingSummary.objects.create(user=instance)
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs) -> None:
+    configure_sqlite(connection)
+    install_query_recorder(connection)
@@ -0,0 +1,216 @@
+"""
+Maintenance of ``BorrowingSummary`` rows.
+
+Checkout, return and extension update the borrower's row in the same
+transaction, under a row lock, without reading their other borrowings.
+A missing row is built from the borrowings (active ones through the
+partial index, late returns from the history) the first time it is
+needed; flows that can change borrowings arbitrarily, like admin edits,
+rebuild it the same way. Deleted borrowings, including those deleted
+with their book, rebuild the summaries of their users once the deleting
+transaction commits.
+
+A loan keeps the daily fee of its book at checkout. Rebuilding a
+summary prices its active loans with the current fee of their books, so
+a changed fee only reaches existing loans when their summary is rebuilt.
+"""
+import threading
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+
+from library.models import Borrowing, BorrowingHistory, BorrowingSummary
+
+
+class PendingRebuilds(threading.local):
+    """Users whose summaries wait for a commit, per database alias."""
+
+    def __init__(self) -> None:
+        self.users = defaultdict(set)
+
+
+pending_rebuilds = PendingRebuilds()
+
+
+def loan(borrowing_id: int, due: date, fee) -> dict:
+    return {"id": borrowing_id, "due": due.isoformat(), "fee": str(fee)}
+
+
+def late_fee(due: date, returned: date, fee) -> Decimal:
+    return Decimal(fee) * max((returned - due).days, 0)
+
+
+def build_summary(user_id: int) -> BorrowingSummary:
+    active = Borrowing.objects.filter(
+        user_id=user_id, actual_return_date=None
+    ).values_list("id", "expected_return_date", "book__daily_fee")
+    late = BorrowingHistory.objects.filter(
+        user_id=user_id, actual_return_date__gt=F("expected_return_date")
+    ).values_list(
+        "expected_return_date", "actual_return_date", "book__daily_fee"
+    )
+    return BorrowingSummary(
+        user_id=user_id,
+        active_loans=sorted(
+            (loan(*row) for row in active),
+            key=lambda item: (item["due"], item["id"]),
+        ),
+        late_fees=sum((late_fee(*row) for row in late), Decimal(0)),
+    )
+
+
+def rebuild_summary(user_id: int) -> BorrowingSummary:
+    summary = build_summary(user_id)
+    summary.save()
+    return summary
+
+
+def rebuild_summaries(user_ids, using: str = None) -> None:
+    """Rebuild the summaries of those of the users that have one."""
+    with transaction.atomic(using=using):
+        for user_id in (
+            BorrowingSummary.objects.select_for_update()
+            .filter(user_id__in=set(user_ids))
+            .values_list("user_id", flat=True)
+        ):
+            rebuild_summary(user_id)
+
+
+def rebuild_summaries_on_commit(user_ids, using: str = None) -> None:
+    """
+    Rebuild the users' summaries once the current transaction commits.
+
+    Users collected during one transaction are rebuilt once each: every
+    call registers a callback, and the first one to run takes all the
+    users pending on the connection, so a cascade deleting many
+    borrowings costs one rebuild per user. Users deleted in the same
+    transaction have no summary left and are skipped.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    pending_rebuilds.users[using].update(user_ids)
+    transaction.on_commit(
+        partial(_rebuild_pending_summaries, using), using=using
+    )
+
+
+def _rebuild_pending_summaries(using: str) -> None:
+    # Users left by a rolled back transaction are rebuilt too, harmlessly.
+    user_ids = pending_rebuilds.users.pop(using, None)
+    if user_ids:
+        rebuild_summaries(user_ids, using)
+
+
+def lock_summary(user_id: int) -> tuple:
+    """
+    Return the user's summary locked for update and whether it was built.
+
+    A summary built now already reflects the borrowings written earlier
+    in the transaction, so callers must not apply their change to it.
+    """
+    summary = (
+        BorrowingSummary.objects.select_for_update()
+        .filter(user_id=user_id)
+        .first()
+    )
+    if summary is not None:
+        return summary, False
+
+    summary = build_summary(user_id)
+    try:
+        with transaction.atomic():
+            summary.save(force_insert=True)
+    except IntegrityError:
+        # Built concurrently from a state without this transaction's rows.
+        return BorrowingSummary.objects.select_for_update().get(
+            user_id=user_id
+        ), False
+    return summary, True
+
+
+def get_summary(user_id: int) -> BorrowingSummary:
+    summary = BorrowingSummary.objects.filter(user_id=user_id).first()
+    if summary is None:
+        with transaction.atomic():
+            summary, _ = lock_summary(user_id)
+    return summary
+
+
+def save_loans(summary: BorrowingSummary, loans: list) -> None:
+    summary.active_loans = sorted(
+        loans, key=lambda item: (item["due"], item["id"])
+    )
+    summary.save(update_fields=["active_loans", "late_fees"])
+
+
+def record_checkouts(borrowings, fees: dict) -> None:
+    """
+    Add new borrowings to their users' summaries.
+
+    ``fees`` maps the book ids to their daily fee. Call inside the
+    transaction that created the borrowings.
+    """
+    by_user = defaultdict(list)
+    for borrowing in borrowings:
+        by_user[borrowing.user_id].append(borrowing)
+
+    for user_id, created in by_user.items():
+        summary, built = lock_summary(user_id)
+        if built:
+            continue
+        save_loans(
+            summary,
+            summary.active_loans
+            + [
+                loan(
+                    borrowing.id,
+                    borrowing.expected_return_date,
+                    fees[borrowing.book_id],
+                )
+                for borrowing in created
+            ],
+        )
+
+
+def record_returns(returned: dict, return_date: date) -> None:
+    """
+    Remove returned borrowings from their users' summaries.
+
+    ``returned`` maps borrowing ids to user ids. Late returns add their
+    fee to ``late_fees``. Call inside the transaction of the return.
+    """
+    by_user = defaultdict(set)
+    for borrowing_id, user_id in returned.items():
+        by_user[user_id].add(borrowing_id)
+
+    for user_id, borrowing_ids in by_user.items():
+        summary, built = lock_summary(user_id)
+        if built:
+            continue
+        loans = []
+        for item in summary.active_loans:
+            if item["id"] not in borrowing_ids:
+                loans.append(item)
+                continue
+            summary.late_fees += late_fee(
+                date.fromisoformat(item["due"]), return_date, item["fee"]
+            )
+        save_loans(summary, loans)
+
+
+def record_extension(borrowing: Borrowing) -> None:
+    """Move the due date of an active borrowing in its user's summary."""
+    summary, built = lock_summary(borrowing.user_id)
+    if built:
+        return
+    due = borrowing.expected_return_date.isoformat()
+    save_loans(
+        summary,
+        [
+            {**item, "due": due} if item["id"] == borrowing.id else item
+            for item in summary.active_loans
+        ],
+    )
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Assertions that pin the maximum number of SQL statements a block runs.
+
+    Unlike ``assertNumQueries`` a budget is an upper bound, so endpoints
+    may get cheaper without breaking tests, and the failure message
+    lists every captured statement to make the N+1 obvious.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, using: str = DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f"{executed} queries executed, budget is {budget}:\n{queries}"
+            )
+
+    def assertRequestWithinBudget(
+        self, client, url: str, budget: int, **params
+    ):
+        """GET ``url`` and check both the status and the query budget."""
+        with self.assertQueryBudget(budget):
+            response = client.get(url, params)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
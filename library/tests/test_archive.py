@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.archive import archive_borrowings
+from library.models import (
+    ArchivedBorrowing,
+    Book,
+    Borrowing,
+    BorrowingSummary,
+)
+
+BORROWING_URL = reverse("library:borrowing-list")
+EXPORT_URL = reverse("library:borrowing-export")
+
+
+class BorrowingArchiveTests(TestCase):
+    def setUp(self) -> None:
+        # Start without the borrowings of the fixture data.
+        Borrowing.objects.all().delete()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.book = Book.objects.create(
+            title="Zapovit", author="Shevchenko", inventory=3, daily_fee=1.5
+        )
+        today = date.today()
+        self.old = self.borrow(today - timedelta(days=400))
+        self.recent = self.borrow(today - timedelta(days=3))
+        self.active = self.borrow(None)
+        self.client.force_authenticate(self.user)
+
+    def borrow(self, returned) -> Borrowing:
+        return Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=date.today(),
+            actual_return_date=returned,
+        )
+
+    def test_moves_only_long_returned_borrowings(self) -> None:
+        before = self.client.get(BORROWING_URL).content
+
+        moved = archive_borrowings(date.today() - timedelta(days=30))
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(
+            set(Borrowing.objects.values_list("id", flat=True)),
+            {self.recent.id, self.active.id},
+        )
+        archived = ArchivedBorrowing.objects.get()
+        self.assertEqual(archived.id, self.old.id)
+        self.assertEqual(archived.borrow_date, self.old.borrow_date)
+        self.assertEqual(self.client.get(BORROWING_URL).content, before)
+
+    def test_deletes_without_signals(self) -> None:
+        summary = BorrowingSummary.objects.get(user=self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            archive_borrowings(date.today() - timedelta(days=30))
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(
+            BorrowingSummary.objects.get(user=self.user).active_loans,
+            summary.active_loans,
+        )
+
+    def test_history_list_merges_indexes(self) -> None:
+        archive_borrowings(date.today())
+        self.user.is_staff = True
+        self.user.save()
+
+        for params in (
+            {"cursor": ""},
+            {"cursor": "", "user_id": self.user.id},
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(BORROWING_URL, params)
+            sql = next(
+                query["sql"]
+                for query in queries
+                if "library_borrowing_history" in query["sql"]
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = [row[3] for row in cursor.fetchall()]
+
+            # Each table is read in index order, nothing is sorted.
+            self.assertIn("MERGE (UNION ALL)", plan)
+            self.assertFalse(
+                [step for step in plan if "TEMP B-TREE" in step], plan
+            )
+
+    def test_batches(self) -> None:
+        for _ in range(4):
+            self.borrow(date.today() - timedelta(days=200))
+
+        moved = archive_borrowings(date.today() - timedelta(days=30), 2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(Borrowing.objects.count(), 2)
+
+    def test_history_endpoints_read_archive(self) -> None:
+        archive_borrowings(date.today())
+
+        detail = self.client.get(
+            reverse("library:borrowing-detail", args=[self.old.id])
+        )
+        keyset = self.client.get(BORROWING_URL, {"cursor": "", "limit": 2})
+        rest = self.client.get(keyset.data["next"])
+        active = self.client.get(BORROWING_URL, {"is_active": "true"})
+        returned = self.client.post(
+            reverse("library:borrowing-return-book", args=[self.old.id])
+        )
+
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(
+            detail.data["actual_return_date"],
+            str(self.old.actual_return_date),
+        )
+        self.assertEqual(
+            [
+                row["id"]
+                for row in keyset.data["results"] + rest.data["results"]
+            ],
+            [self.active.id, self.recent.id, self.old.id],
+        )
+        self.assertEqual(
+            [row["id"] for row in active.data["results"]], [self.active.id]
+        )
+        self.assertEqual(returned.status_code, 406)
+
+    def test_export_includes_archive(self) -> None:
+        archive_borrowings(date.today())
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get(EXPORT_URL)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 4)
+
+    def test_command(self) -> None:
+        out = StringIO()
+
+        call_command("archive_borrowings", days=30, stdout=out)
+
+        self.assertIn("Archived 1 borrowings", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("archive_borrowings", batch_size=0)
@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, force_authenticate
+
+from library.async_views import (
+    DETAIL_ACTIONS,
+    LIST_ACTIONS,
+    async_read_view,
+)
+from library.models import Book, Borrowing
+from library.views import BookViewSet, BorrowingViewSet
+
+BOOK_URL = reverse("library:book-list")
+BORROWING_URL = reverse("library:borrowing-list")
+
+book_list = async_read_view(BookViewSet, LIST_ACTIONS)
+book_detail = async_read_view(BookViewSet, DETAIL_ACTIONS)
+borrowing_list = async_read_view(BorrowingViewSet, LIST_ACTIONS)
+borrowing_detail = async_read_view(BorrowingViewSet, DETAIL_ACTIONS)
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self) -> None:
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin123@admin.com", "test1234", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.book = Book.objects.create(
+            title="Zapovit", author="Shevchenko", inventory=3, daily_fee=1.5
+        )
+        self.borrowing = Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=date.today() + timedelta(days=5),
+        )
+
+    async def call(self, view, url, user=None, headers=None, **kwargs):
+        request = self.factory.get(
+            url, kwargs.pop("params", {}), headers=headers
+        )
+        if user is not None:
+            force_authenticate(request, user)
+        return await view(request, **kwargs)
+
+    async def sync_content(self, url, user=None, **params) -> bytes:
+        def get():
+            cache.clear()
+            self.client.force_authenticate(user)
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            return response.content
+
+        return await sync_to_async(get)()
+
+    async def assertParity(self, view, url, user=None, params=None, **kw):
+        expected = await self.sync_content(url, user, **(params or {}))
+        await sync_to_async(cache.clear)()
+
+        response = await self.call(view, url, user, params=params, **kw)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected)
+
+    async def test_book_list_matches_sync_view(self) -> None:
+        await self.assertParity(book_list, BOOK_URL)
+        await self.assertParity(book_list, BOOK_URL, params={"offset": 2})
+        await self.assertParity(book_list, BOOK_URL, params={"cursor": ""})
+        await self.assertParity(book_list, BOOK_URL, params={"q": "zapov"})
+        await self.assertParity(
+            book_list, BOOK_URL, params={"fields": "id,inventory"}
+        )
+
+    @override_settings(LIBRARY_FAST_LISTS=False)
+    async def test_lists_use_serializers_without_fast_lists(self) -> None:
+        for viewset in (BookViewSet, BorrowingViewSet):
+            self.enterContext(
+                patch.object(
+                    viewset, "get_row_serializer", side_effect=AssertionError
+                )
+            )
+
+        await self.assertParity(book_list, BOOK_URL)
+        await self.assertParity(book_list, BOOK_URL, params={"cursor": ""})
+        await self.assertParity(borrowing_list, BORROWING_URL, self.admin)
+
+    async def test_book_retrieve_matches_sync_view(self) -> None:
+        url = reverse("library:book-detail", args=[self.book.id])
+
+        await self.assertParity(book_detail, url, pk=str(self.book.id))
+
+    async def test_borrowings_match_sync_view(self) -> None:
+        detail_url = reverse(
+            "library:borrowing-detail", args=[self.borrowing.id]
+        )
+        for user in (self.user, self.admin):
+            await self.assertParity(borrowing_list, BORROWING_URL, user)
+            await self.assertParity(
+                borrowing_list, BORROWING_URL, user, {"cursor": ""}
+            )
+            await self.assertParity(
+                borrowing_detail, detail_url, user, pk=str(self.borrowing.id)
+            )
+            await self.assertParity(
+                borrowing_detail,
+                detail_url,
+                user,
+                {"fields": "id,book"},
+                pk=str(self.borrowing.id),
+            )
+
+    async def test_missing_book(self) -> None:
+        url = reverse("library:book-detail", args=[0])
+
+        response = await self.call(book_detail, url, pk="0")
+        invalid = await self.call(book_detail, url, pk="abc")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(invalid.status_code, 404)
+
+    async def test_borrowings_of_other_users_are_hidden(self) -> None:
+        other = await get_user_model().objects.acreate(
+            email="other@test.com", password="x"
+        )
+        url = reverse("library:borrowing-detail", args=[self.borrowing.id])
+
+        response = await self.call(
+            borrowing_detail, url, other, pk=str(self.borrowing.id)
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_authentication_required(self) -> None:
+        response = await self.call(borrowing_list, BORROWING_URL)
+
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    async def test_not_modified(self) -> None:
+        response = await self.call(book_list, BOOK_URL)
+
+        repeated = await self.call(
+            book_list,
+            BOOK_URL,
+            headers={"If-None-Match": response["ETag"]},
+        )
+
+        self.assertEqual(repeated.status_code, 304)
+        self.assertEqual(repeated["ETag"], response["ETag"])
+
+    async def test_writes_use_sync_viewset(self) -> None:
+        request = self.factory.post(
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": str(date.today() + timedelta(days=3)),
+            },
+            content_type="application/json",
+        )
+        force_authenticate(request, self.user)
+
+        response = await borrowing_list(request)
+
+        self.assertEqual(response.status_code, 201)
+        book = await Book.objects.aget(pk=self.book.pk)
+        self.assertEqual(book.inventory, 2)
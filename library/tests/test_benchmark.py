@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from library.benchmark import SCENARIOS, percentile, sql_queries, summarize
+
+
+class BenchmarkHelpersTests(SimpleTestCase):
+    def test_sql_queries(self) -> None:
+        self.assertEqual(sql_queries('app;dur=3.2, sql;desc="4"'), 4)
+        self.assertEqual(sql_queries("sql;dur=1;desc=2"), 2)
+        self.assertIsNone(sql_queries("app;dur=3.2"))
+        self.assertIsNone(sql_queries(None))
+
+    def test_summarize(self) -> None:
+        samples = [(200, index / 1000, 2, b"") for index in range(1, 101)]
+        samples.append((500, 0.5, None, b""))
+
+        result = summarize(samples, elapsed=2)
+
+        self.assertEqual(result["requests"], 101)
+        self.assertEqual(result["errors"], 1)
+        self.assertEqual(result["requests_per_second"], 50.5)
+        self.assertEqual(result["latency_ms"]["max"], 500)
+        self.assertEqual(result["sql_queries_per_request"], 2)
+        self.assertIsNone(percentile([], 0.5))
+
+
+class BenchmarkCommandTests(LiveServerTestCase):
+    def test_benchmark_writes_results(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+
+            call_command(
+                "benchmark_api",
+                base_url=self.live_server_url,
+                scenarios=list(SCENARIOS),
+                concurrency=1,
+                duration=0.2,
+                output=output,
+                stdout=StringIO(),
+            )
+            with open(output, encoding="utf-8") as file:
+                results = json.load(file)
+
+        for name in SCENARIOS:
+            self.assertGreater(results["scenarios"][name]["requests"], 0)
+            self.assertEqual(results["scenarios"][name]["errors"], 0)
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse, reverse_lazy
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -8,6 +11,7 @@ from library.models import Book
 from library.serializers import BookListSerializer, BookSerializer
 
 BOOK_URL = reverse("library:book-list")
+IMPORT_URL = reverse("library:book-import-books")
 
 
 def detail_url(book_id: int):
@@ -89,6 +93,148 @@ class AuthenticatedBookApiTests(TestCase):
         self.assertNotIn(serializer1.data, response.data["results"])
         self.assertIn(serializer2.data, response.data["results"])
 
+    def test_filters_match_substrings(self) -> None:
+        book = test_book(title="Haidamaky", author="Kotliarevsky")
+        primer = test_book(title="C++ Primer", author="Lippman")
+
+        by_title = self.client.get(BOOK_URL, {"title": "damak"})
+        by_author = self.client.get(BOOK_URL, {"author": "liarev"})
+        no_words = self.client.get(BOOK_URL, {"title": "++"})
+
+        self.assertEqual(
+            [row["id"] for row in by_title.data["results"]], [book.id]
+        )
+        self.assertEqual(
+            [row["id"] for row in by_author.data["results"]], [book.id]
+        )
+        self.assertEqual(
+            [row["id"] for row in no_words.data["results"]], [primer.id]
+        )
+
+    def test_search(self) -> None:
+        book1 = test_book(title="Animal Farm", author="George Orwell")
+        book2 = test_book(title="Nineteen Eighty-Four", author="Orwell")
+        book3 = test_book(title="Kobzar", author="Taras")
+
+        response = self.client.get(BOOK_URL, {"q": "orw"})
+        ids = [book["id"] for book in response.data["results"]]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(book1.id, ids)
+        self.assertIn(book2.id, ids)
+        self.assertNotIn(book3.id, ids)
+
+    def test_search_matches_all_terms(self) -> None:
+        book1 = test_book(title="Animal Farm", author="George Orwell")
+        book2 = test_book(title="Nineteen Eighty-Four", author="Orwell")
+
+        response = self.client.get(BOOK_URL, {"q": "orwell anim"})
+        ids = [book["id"] for book in response.data["results"]]
+
+        self.assertEqual(ids, [book1.id])
+        self.assertNotIn(book2.id, ids)
+
+    def test_search_with_author_filter(self) -> None:
+        book1 = test_book(title="Animal Farm", author="George Orwell")
+        book2 = test_book(title="Orwell biography", author="Taras")
+
+        response = self.client.get(BOOK_URL, {"q": "orwell", "author": "tar"})
+        ids = [book["id"] for book in response.data["results"]]
+
+        self.assertEqual(ids, [book2.id])
+        self.assertNotIn(book1.id, ids)
+
+    def test_search_index_follows_updates(self) -> None:
+        book = test_book(title="Zapovit", author="Taras")
+        Book.objects.filter(pk=book.id).update(title="Haidamaky")
+
+        response1 = self.client.get(BOOK_URL, {"q": "zapovit"})
+        response2 = self.client.get(BOOK_URL, {"q": "haidam"})
+
+        self.assertEqual(response1.data["results"], [])
+        self.assertEqual(response2.data["results"][0]["id"], book.id)
+
+    def test_keyset_pagination(self) -> None:
+        for index in range(5):
+            test_book(title="Same title", author=f"Author {index % 2}")
+        expected = list(
+            Book.objects.order_by("title", "author", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        ids = []
+        url = f"{BOOK_URL}?cursor=&limit=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids += [book["id"] for book in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, expected)
+
+    def test_keyset_pagination_invalid_cursor(self) -> None:
+        response = self.client.get(BOOK_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    def test_book_list_is_cached(self) -> None:
+        test_book()
+        self.client.get(BOOK_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(BOOK_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=False)
+    def test_book_list_not_cached_when_disabled(self) -> None:
+        test_book()
+        self.client.get(BOOK_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(BOOK_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(queries)
+
+    def test_cached_book_refreshed_after_inventory_change(self) -> None:
+        book = test_book()
+        url = detail_url(book.id)
+        self.client.get(url)
+
+        Book.objects.reserve(book.id)
+        response = self.client.get(url)
+
+        self.assertEqual(response.data["inventory"], book.inventory - 1)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    def test_book_retrieve_not_modified(self) -> None:
+        book = test_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    def test_book_etag_changes_with_book(self) -> None:
+        book = test_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        book.title = "New title"
+        book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
 
 class AdminBookApiTest(TestCase):
     def setUp(self) -> None:
@@ -127,3 +273,60 @@ class AdminBookApiTest(TestCase):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_book_import(self) -> None:
+        book = test_book(title="Kobzar", author="Taras", inventory=1)
+        content = (
+            "title,author,inventory,daily_fee,cover\n"
+            "Kobzar,Taras,2,0.50,HARD\n"
+            "Mavka,Lesya,4,0.30,SOFT\n"
+            "Broken,Author,-1,0.30,SOFT\n"
+        )
+        upload = SimpleUploadedFile("books.csv", content.encode())
+
+        response = self.client.post(
+            IMPORT_URL, {"file": upload}, format="multipart"
+        )
+        book.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(response.data["failed"], 1)
+        self.assertEqual(response.data["errors"][0]["line"], 4)
+        self.assertEqual(book.inventory, 3)
+        self.assertEqual(book.cover, "HARD")
+        self.assertTrue(
+            Book.objects.filter(title="Mavka", author="Lesya").exists()
+        )
+
+    def test_book_import_undecodable_file(self) -> None:
+        content = b"title,author,inventory,daily_fee\nMavka,Lesya,4,0.30\n"
+        upload = SimpleUploadedFile("books.csv", content + b"\xff\xfe\xfa\n")
+
+        response = self.client.post(
+            IMPORT_URL, {"file": upload}, format="multipart"
+        )
+
+        # The wrapper decodes ahead, so this short file fails at once.
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual(response.data["failed"], 1)
+        self.assertIn(
+            "Unreadable",
+            response.data["errors"][0]["errors"]["non_field_errors"][0],
+        )
+
+    def test_book_import_forbidden_for_users(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "test123@test.com", "Test1234"
+            )
+        )
+        upload = SimpleUploadedFile("books.csv", b"title,author\n")
+
+        response = self.client.post(
+            IMPORT_URL, {"file": upload}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
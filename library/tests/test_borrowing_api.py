@@ -1,18 +1,24 @@
+import json
 from datetime import date, timedelta
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIClient
 
 from library.models import Book, Borrowing
 from library.serializers import (
+    BorrowingSerializer,
     BorrowingListSerializer,
     BorrowingListStaffSerializer,
 )
 
 BORROWING_URL = reverse("library:borrowing-list")
+BATCH_CHECKOUT_URL = reverse("library:borrowing-batch-checkout")
+BULK_RETURN_URL = reverse("library:borrowing-bulk-return")
+EXPORT_URL = reverse("library:borrowing-export")
 
 
 def detail_url(borrowing_id: int):
@@ -101,6 +107,90 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(book.inventory, inventory - 1)
 
+    def test_create_borrowing_unavailable_book(self) -> None:
+        book = test_book(title="Kobzar", author="Taras", inventory=0)
+        payload = {
+            "book": book.id,
+            "expected_return_date": date.today() + timedelta(days=5),
+        }
+
+        response = self.client.post(BORROWING_URL, payload)
+        book.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(book.inventory, 0)
+        self.assertFalse(Borrowing.objects.filter(book=book).exists())
+
+    def test_create_borrowing_does_not_oversell(self) -> None:
+        book = test_book(title="Kobzar", author="Taras", inventory=1)
+        serializer = BorrowingSerializer(
+            data={
+                "book": book.id,
+                "expected_return_date": date.today() + timedelta(days=5),
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        Book.objects.filter(pk=book.id).update(inventory=0)
+
+        with self.assertRaises(ValidationError):
+            serializer.save(user=self.user)
+        book.refresh_from_db()
+
+        self.assertEqual(book.inventory, 0)
+        self.assertFalse(Borrowing.objects.filter(book=book).exists())
+
+    def test_batch_checkout(self) -> None:
+        book1 = test_book(title="Kobzar", author="Taras")
+        book2 = test_book(title="1984", author="Orwell", inventory=2)
+        return_date = date.today() + timedelta(days=5)
+        payload = [
+            {"book": book1.id, "expected_return_date": return_date},
+            {"book": book2.id, "expected_return_date": return_date},
+            {"book": book2.id, "expected_return_date": return_date},
+        ]
+
+        # Books, savepoint, reserve, insert, summary read and update,
+        # release.
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                BATCH_CHECKOUT_URL, payload, format="json"
+            )
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item["book"] for item in response.data],
+            [book1.id, book2.id, book2.id],
+        )
+        self.assertEqual(book1.inventory, 2)
+        self.assertEqual(book2.inventory, 0)
+        self.assertEqual(
+            Borrowing.objects.filter(user=self.user).count(), 3
+        )
+
+    def test_batch_checkout_reports_unavailable_items(self) -> None:
+        book1 = test_book(title="Kobzar", author="Taras")
+        book2 = test_book(title="1984", author="Orwell", inventory=1)
+        return_date = date.today() + timedelta(days=5)
+        payload = [
+            {"book": book1.id, "expected_return_date": return_date},
+            {"book": book2.id, "expected_return_date": return_date},
+            {"book": book2.id, "expected_return_date": return_date},
+        ]
+
+        response = self.client.post(
+            BATCH_CHECKOUT_URL, payload, format="json"
+        )
+        book1.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1], {})
+        self.assertIn("non_field_errors", response.data[2])
+        self.assertEqual(book1.inventory, 3)
+        self.assertFalse(Borrowing.objects.filter(user=self.user).exists())
+
     def test_filter_active_borrowings(self) -> None:
         borrowing1 = test_borrowing(user=self.user)
         borrowing2 = test_borrowing(
@@ -131,6 +221,37 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEqual(borrowing.book.inventory, inventory + 1)
         self.assertIsNotNone(response2.data["actual_return_date"])
 
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    def test_borrowing_list_not_modified(self) -> None:
+        borrowing = test_borrowing(user=self.user)
+        etag = self.client.get(BORROWING_URL)["ETag"]
+
+        response1 = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+        self.client.post(return_borrowing_url(borrowing.id))
+        response2 = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response1.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response2.status_code, status.HTTP_200_OK)
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=False)
+    def test_no_etag_without_response_cache(self) -> None:
+        test_borrowing(user=self.user)
+
+        response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("ETag"))
+
+    @override_settings(LIBRARY_RESPONSE_CACHE=True)
+    def test_borrowing_etag_differs_per_user(self) -> None:
+        test_borrowing(user=self.user)
+        etag = self.client.get(BORROWING_URL)["ETag"]
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get(BORROWING_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_return_already_returned_borrowing(self) -> None:
         book = test_book(title="Kobzar", author="Taras")
         borrowing = test_borrowing(
@@ -142,6 +263,20 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
 
+    def test_export_forbidden(self) -> None:
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_return_forbidden(self) -> None:
+        borrowing = test_borrowing(user=self.user)
+
+        response = self.client.post(
+            BULK_RETURN_URL, {"ids": [borrowing.id]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class AdminBorrowingApiTest(TestCase):
     def setUp(self) -> None:
@@ -179,6 +314,25 @@ class AdminBorrowingApiTest(TestCase):
         self.assertNotIn(serializer2.data, response.data["results"])
         self.assertIn(serializer1.data, response.data["results"])
 
+    def test_keyset_pagination(self) -> None:
+        for _ in range(5):
+            test_borrowing(user=self.user)
+        expected = list(
+            Borrowing.objects.order_by("-borrow_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+        ids = []
+        url = f"{BORROWING_URL}?cursor=&limit=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [borrowing["id"] for borrowing in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, expected)
+
     def test_update_borrowing(self) -> None:
         borrowing = test_borrowing(user=self.user)
         url = detail_url(borrowing.id)
@@ -195,6 +349,89 @@ class AdminBorrowingApiTest(TestCase):
             str(payload["expected_return_date"]),
         )
 
+    def test_bulk_return(self) -> None:
+        book1 = test_book(title="Kobzar", author="Taras", inventory=0)
+        book2 = test_book(title="1984", author="Orwell", inventory=0)
+        borrowing1 = test_borrowing(book=book1, user=self.user)
+        borrowing2 = test_borrowing(book=book1, user=self.admin)
+        borrowing3 = test_borrowing(book=book2, user=self.user)
+        returned = test_borrowing(
+            book=book2, user=self.user, actual_return_date=date.today()
+        )
+        payload = {
+            "ids": [borrowing1.id, borrowing2.id, borrowing3.id, returned.id]
+        }
+
+        response = self.client.post(BULK_RETURN_URL, payload, format="json")
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["returned"],
+            sorted([borrowing1.id, borrowing2.id, borrowing3.id]),
+        )
+        self.assertEqual(response.data["already_returned"], [returned.id])
+        self.assertEqual(response.data["not_found"], [])
+        self.assertEqual(book1.inventory, 2)
+        self.assertEqual(book2.inventory, 1)
+        self.assertFalse(
+            Borrowing.objects.filter(
+                pk__in=payload["ids"], actual_return_date=None
+            ).exists()
+        )
+
+    def test_export_csv(self) -> None:
+        borrowing1 = test_borrowing(user=self.user)
+        borrowing2 = test_borrowing(
+            user=self.user, actual_return_date=date.today()
+        )
+        test_borrowing(user=self.admin)
+
+        response = self.client.get(
+            EXPORT_URL, {"user_id": self.user.id, "is_active": "true"}
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            lines[1].split(","),
+            [
+                str(borrowing1.id),
+                str(self.user.id),
+                str(borrowing1.book_id),
+                borrowing1.book.title,
+                borrowing1.book.author,
+                str(borrowing1.borrow_date),
+                str(borrowing1.expected_return_date),
+                "",
+            ],
+        )
+        self.assertNotIn(str(borrowing2.id), [line[0] for line in lines])
+
+    def test_export_ndjson(self) -> None:
+        borrowing = test_borrowing(user=self.user)
+
+        response = self.client.get(
+            EXPORT_URL, {"user_id": self.user.id, "output": "ndjson"}
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        data = json.loads(lines[0])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(data["id"], borrowing.id)
+        self.assertEqual(data["book_title"], borrowing.book.title)
+        self.assertIsNone(data["actual_return_date"])
+
+    def test_export_unknown_format(self) -> None:
+        response = self.client.get(EXPORT_URL, {"output": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_delete_book(self) -> None:
         borrowing = test_borrowing(user=self.user)
         url = detail_url(borrowing.id)
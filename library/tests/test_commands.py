@@ -0,0 +1,180 @@
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from library.cache import borrowings_version_key, get_version
+from library.models import Book, Borrowing, BorrowingSummary
+
+
+class ImportBooksCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "books.jsonl")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, rows: list) -> None:
+        with open(self.path, "w", encoding="utf-8") as file:
+            for row in rows:
+                file.write(
+                    row if isinstance(row, str) else json.dumps(row)
+                )
+                file.write("\n")
+
+    def test_import_jsonl_in_batches(self) -> None:
+        Book.objects.create(
+            title="Imported", author="Author", inventory=1, daily_fee=0.1
+        )
+        rows = [
+            {
+                "title": f"Title {index}",
+                "author": "Author",
+                "inventory": 1,
+                "daily_fee": "0.25",
+            }
+            for index in range(5)
+        ]
+        rows.append(
+            {
+                "title": "Imported",
+                "author": "Author",
+                "inventory": 2,
+                "daily_fee": "0.75",
+            }
+        )
+        self.write(rows)
+        out = StringIO()
+
+        call_command("import_books", self.path, batch_size=2, stdout=out)
+        imported = Book.objects.get(title="Imported")
+
+        self.assertEqual(
+            Book.objects.filter(title__startswith="Title ").count(), 5
+        )
+        self.assertEqual(imported.inventory, 3)
+        self.assertEqual(str(imported.daily_fee), "0.75")
+        self.assertEqual(out.getvalue().count("Processed"), 3)
+        self.assertFalse(os.path.exists(f"{self.path}.errors.jsonl"))
+
+    def test_import_writes_error_file(self) -> None:
+        self.write(
+            [
+                {
+                    "title": "Valid",
+                    "author": "A",
+                    "inventory": 1,
+                    "daily_fee": "0.25",
+                },
+                {"title": "No fee", "author": "A", "inventory": 1},
+                "{not json",
+            ]
+        )
+
+        call_command("import_books", self.path, stdout=StringIO())
+        with open(f"{self.path}.errors.jsonl", encoding="utf-8") as file:
+            errors = [json.loads(line) for line in file]
+
+        self.assertTrue(Book.objects.filter(title="Valid").exists())
+        self.assertEqual([error["line"] for error in errors], [2, 3])
+        self.assertIn("daily_fee", errors[0]["errors"])
+
+
+class GenerateDatasetCommandTests(TestCase):
+    def test_generate_dataset(self) -> None:
+        books = Book.objects.count()
+        borrowings = Borrowing.objects.count()
+
+        call_command(
+            "generate_dataset",
+            users=5,
+            books=20,
+            borrowings=300,
+            seed=7,
+            chunk_size=64,
+            stdout=StringIO(),
+        )
+        generated = Borrowing.objects.filter(
+            user__email__endswith=".7@load.test"
+        )
+        popular = (
+            generated.values("book")
+            .annotate(loans=Count("id"))
+            .order_by("-loans")
+            .first()
+        )
+
+        self.assertEqual(
+            get_user_model().objects.filter(
+                email__endswith=".7@load.test"
+            ).count(),
+            5,
+        )
+        self.assertEqual(Book.objects.count(), books + 20)
+        self.assertEqual(Borrowing.objects.count(), borrowings + 300)
+        self.assertTrue(generated.filter(actual_return_date=None).exists())
+        self.assertTrue(
+            generated.filter(actual_return_date__isnull=False).exists()
+        )
+        self.assertTrue(
+            generated.filter(borrow_date__lt=date.today()).exists()
+        )
+        self.assertGreater(popular["loans"], 300 / 20 * 2)
+        self.assertTrue(
+            Borrowing._meta.get_field("borrow_date").auto_now_add
+        )
+
+    def test_active_loans_take_copies(self) -> None:
+        call_command(
+            "generate_dataset",
+            users=3,
+            books=4,
+            borrowings=200,
+            seed=8,
+            years=0,
+            stdout=StringIO(),
+        )
+        generated = Borrowing.objects.filter(
+            user__email__endswith=".8@load.test"
+        )
+        popular = (
+            generated.values("book")
+            .annotate(loans=Count("id"))
+            .order_by("-loans")
+            .first()
+        )
+
+        # Everything was borrowed today and is still out.
+        self.assertFalse(generated.exclude(actual_return_date=None))
+        self.assertEqual(Book.objects.get(pk=popular["book"]).inventory, 0)
+        self.assertFalse(Book.objects.filter(inventory__lt=0))
+
+    def test_existing_summaries_and_caches_are_refreshed(self) -> None:
+        user = get_user_model().objects.create_user(
+            "user0.9@load.test", "password"
+        )
+        version = get_version(borrowings_version_key(user.id))
+
+        call_command(
+            "generate_dataset",
+            users=1,
+            books=2,
+            borrowings=20,
+            seed=9,
+            years=0,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            len(BorrowingSummary.objects.get(user=user).active_loans), 20
+        )
+        self.assertNotEqual(
+            get_version(borrowings_version_key(user.id)), version
+        )
@@ -0,0 +1,43 @@
+import os
+import sqlite3
+import tempfile
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from library.database import configure_sqlite
+
+
+class FakeConnection:
+    vendor = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        self.connection = sqlite3.connect(path)
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite pragmas")
+class SqlitePragmaTests(TestCase):
+    def pragma(self, raw, name: str):
+        return raw.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            fake = FakeConnection(os.path.join(directory, "db.sqlite3"))
+
+            configure_sqlite(fake)
+
+            raw = fake.connection
+            self.assertEqual(self.pragma(raw, "journal_mode"), "wal")
+            self.assertEqual(self.pragma(raw, "busy_timeout"), 5000)
+            # NORMAL
+            self.assertEqual(self.pragma(raw, "synchronous"), 1)
+            self.assertEqual(
+                self.pragma(raw, "mmap_size"), 256 * 1024 * 1024
+            )
+            raw.close()
+
+    def test_django_connection_is_configured(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
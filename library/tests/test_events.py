@@ -0,0 +1,174 @@
+import socket
+import tempfile
+import threading
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncRequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.async_views import book_events
+from library.events import SocketBroker, inventory_events
+from library.models import Book, Borrowing
+
+EVENTS_URL = reverse("library:book-events")
+BORROWING_URL = reverse("library:borrowing-list")
+
+
+@override_settings(INVENTORY_STREAM_KEEPALIVE=0.05)
+class BookEventsTests(TestCase):
+    def setUp(self) -> None:
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(
+            title="Zapovit", author="Shevchenko", inventory=1, daily_fee=1.5
+        )
+        self.other = Book.objects.create(
+            title="Kobzar", author="Shevchenko", inventory=2, daily_fee=1
+        )
+
+    async def stream(self, ids: str):
+        request = self.factory.get(EVENTS_URL, {"ids": ids})
+        response = await book_events(request)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response.streaming_content
+
+    def write(self, method: str, *args, **kwargs):
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                return getattr(self.client, method)(*args, **kwargs)
+
+        return sync_to_async(run)()
+
+    async def test_sends_snapshot_then_changes(self) -> None:
+        events = await self.stream(f"{self.book.id}")
+
+        snapshot = (await anext(events)).decode()
+        await self.write(
+            "post",
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": date.today() + timedelta(days=3),
+            },
+        )
+        change = (await anext(events)).decode()
+        borrowing = await Borrowing.objects.aget(book=self.book)
+        await self.write(
+            "post",
+            reverse("library:borrowing-return-book", args=[borrowing.id]),
+        )
+        returned = (await anext(events)).decode()
+        await events.aclose()
+
+        self.assertIn(f'"id": {self.book.id}, "inventory": 1', snapshot)
+        self.assertIn(f'"id": {self.book.id}, "inventory": 0', change)
+        self.assertIn(f'"id": {self.book.id}, "inventory": 1', returned)
+
+    async def test_only_watched_books_and_keepalive(self) -> None:
+        events = await self.stream(f"{self.book.id}")
+        await anext(events)
+
+        await self.write(
+            "post",
+            BORROWING_URL,
+            {
+                "book": self.other.id,
+                "expected_return_date": date.today() + timedelta(days=3),
+            },
+        )
+
+        self.assertEqual(await anext(events), b": keepalive\n\n")
+        await events.aclose()
+
+    @override_settings(INVENTORY_STREAM_TIMEOUT=0.2)
+    async def test_stream_closes_after_timeout(self) -> None:
+        subscriptions = len(inventory_events.subscriptions)
+        events = await self.stream(f"{self.book.id}")
+
+        chunks = [chunk async for chunk in events]
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(inventory_events.subscriptions), subscriptions)
+
+    async def test_admin_edit_is_published(self) -> None:
+        events = await self.stream(f"{self.book.id},{self.other.id}")
+        await anext(events)
+
+        def restock():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.other.inventory = 7
+                self.other.save()
+
+        await sync_to_async(restock)()
+
+        change = (await anext(events)).decode()
+        await events.aclose()
+        self.assertIn(f'"id": {self.other.id}, "inventory": 7', change)
+
+    async def test_invalid_ids(self) -> None:
+        for ids in ("", "1,x", ",".join(map(str, range(101)))):
+            response = await book_events(
+                self.factory.get(EVENTS_URL, {"ids": ids})
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_asgi(self) -> None:
+        response = self.client.get(EVENTS_URL, {"ids": self.book.id})
+
+        self.assertEqual(response.status_code, 501)
+
+
+class SocketBrokerTests(TransactionTestCase):
+    async def test_changes_reach_listening_process(self) -> None:
+        book = await Book.objects.acreate(
+            title="Zapovit", author="Shevchenko", inventory=1, daily_fee=1
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(INVENTORY_EVENTS_DIR=directory):
+                subscription = inventory_events.subscribe({book.id})
+                try:
+                    await sync_to_async(Book.objects.reserve)(book.id)
+                    changes = await subscription.wait(5)
+                finally:
+                    inventory_events.unsubscribe(subscription)
+
+        self.assertEqual(changes, {book.id: 0})
+
+    def test_malformed_messages_are_skipped(self) -> None:
+        received = []
+        delivered = threading.Event()
+
+        def on_message(book_ids) -> None:
+            received.append(book_ids)
+            delivered.set()
+
+        receiver, sender = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_DGRAM
+        )
+        self.addCleanup(sender.close)
+        threading.Thread(
+            target=SocketBroker(on_message).receive,
+            args=(receiver,),
+            daemon=True,
+        ).start()
+
+        with self.assertLogs("library.events", "ERROR"):
+            sender.send(b"[1, ")
+            sender.send(b"7")
+            sender.send(b"[1, 2]")
+            self.assertTrue(delivered.wait(5))
+
+        self.assertEqual(received, [{1, 2}])
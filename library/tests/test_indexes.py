@@ -0,0 +1,46 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from library.models import Book, Borrowing
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans checked on SQLite")
+class QueryPlanTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+
+    def assertUsesIndex(self, queryset, index: str) -> None:
+        plan = queryset.explain()
+
+        self.assertIn(index, plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_book_list(self) -> None:
+        queryset = Book.objects.order_by("title", "author", "id")
+
+        self.assertUsesIndex(queryset, "library_book_title_author_idx")
+
+    def test_borrowing_list_for_staff(self) -> None:
+        queryset = Borrowing.objects.order_by("-borrow_date", "-id")
+
+        self.assertUsesIndex(queryset, "library_borrowing_date_idx")
+
+    def test_borrowing_list_for_user(self) -> None:
+        queryset = Borrowing.objects.filter(user=self.user).order_by(
+            "-borrow_date", "-id"
+        )
+
+        self.assertUsesIndex(queryset, "library_borrowing_user_idx")
+
+    def test_active_borrowing_list_for_user(self) -> None:
+        queryset = Borrowing.objects.filter(
+            user=self.user, actual_return_date=None
+        ).order_by("-borrow_date", "-id")
+
+        self.assertUsesIndex(queryset, "library_borrowing_active_idx")
@@ -0,0 +1,226 @@
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.metrics import Registry, read_dump, registry, render
+from library.middleware import MetricsMiddleware
+from library.models import Book, Borrowing
+
+METRICS_URL = reverse("metrics")
+
+
+def sample(text: str, line_start: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not found")
+
+
+class RegistryTests(TestCase):
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        metrics = Registry()
+        for seconds in (0.001, 0.02, 0.02, 20):
+            metrics.observe(
+                "library_http_request_duration_seconds",
+                seconds,
+                route="r",
+                method="GET",
+            )
+
+        text = render(metrics.collect(), {})
+        prefix = (
+            'library_http_request_duration_seconds_bucket{method="GET",'
+            'route="r",le='
+        )
+        self.assertEqual(sample(text, prefix + '"0.005"}'), 1)
+        self.assertEqual(sample(text, prefix + '"0.025"}'), 3)
+        self.assertEqual(sample(text, prefix + '"10.0"}'), 3)
+        self.assertEqual(sample(text, prefix + '"+Inf"}'), 4)
+        self.assertEqual(
+            sample(
+                text,
+                'library_http_request_duration_seconds_count'
+                '{method="GET",route="r"}',
+            ),
+            4,
+        )
+
+    def test_label_values_are_escaped(self) -> None:
+        metrics = Registry()
+        metrics.inc("library_cache_requests_total", cache='a"b\\c', result="x")
+
+        text = render(metrics.collect(), {})
+
+        self.assertIn('cache="a\\"b\\\\c"', text)
+
+    def test_workers_are_merged_from_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            with open(
+                os.path.join(directory, "metrics-1.json"), "w"
+            ) as dump:
+                dump.write(
+                    '[["library_cache_requests_total", '
+                    '[["cache", "catalog"], ["result", "hit"]], 5]]'
+                )
+            metrics = Registry()
+            metrics.inc(
+                "library_cache_requests_total", cache="catalog", result="hit"
+            )
+
+            text = render(metrics.collect(), {})
+
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(directory, f"metrics-{os.getpid()}.json")
+                )
+            )
+        self.assertEqual(
+            sample(
+                text,
+                'library_cache_requests_total{cache="catalog",result="hit"}',
+            ),
+            6,
+        )
+
+    def test_concurrent_flushes_write_whole_dumps(self) -> None:
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            metrics = Registry()
+            metrics.inc("library_cache_requests_total", cache="c", result="r")
+            threads = [
+                threading.Thread(target=metrics.flush, args=(True,))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(
+                os.listdir(directory), [f"metrics-{os.getpid()}.json"]
+            )
+            self.assertEqual(
+                read_dump(os.path.join(directory, os.listdir(directory)[0])),
+                {
+                    (
+                        "library_cache_requests_total",
+                        (("cache", "c"), ("result", "r")),
+                    ): 1
+                },
+            )
+
+    async def test_async_requests_flush_off_the_event_loop(self) -> None:
+        async def get_response(request):
+            return HttpResponse()
+
+        flushed = []
+        middleware = MetricsMiddleware(get_response)
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ), patch.object(registry, "last_flush", 0.0), patch.object(
+            registry,
+            "flush",
+            lambda: flushed.append(threading.get_ident()),
+        ):
+            await middleware(AsyncRequestFactory().get("/"))
+
+        self.assertEqual(len(flushed), 1)
+        self.assertNotEqual(flushed[0], threading.get_ident())
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.admin = get_user_model().objects.create_user(
+            "admin123@admin.com", "test1234", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.book = Book.objects.create(
+            title="Title", author="Author", inventory=0, daily_fee=0.25
+        )
+        Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=date.today() + timedelta(days=5),
+        )
+
+    def test_requests_are_counted_by_view(self) -> None:
+        key = (
+            'library_http_requests_total{method="GET",'
+            'route="BorrowingViewSet.list",status="200"}'
+        )
+        before = render(registry.collect(), {})
+        try:
+            count = sample(before, key)
+        except AssertionError:
+            count = 0
+
+        self.client.get(reverse("library:borrowing-list"))
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertEqual(sample(text, key), count + 1)
+        self.assertIn(
+            'library_db_queries_total{method="GET",'
+            'route="BorrowingViewSet.list"}',
+            text,
+        )
+
+    def test_business_gauges(self) -> None:
+        text = self.client.get(METRICS_URL).content.decode()
+
+        self.assertEqual(
+            sample(text, "library_active_borrowings"),
+            Borrowing.objects.filter(actual_return_date=None).count(),
+        )
+        self.assertEqual(
+            sample(text, "library_books_out_of_stock"),
+            Book.objects.filter(inventory=0).count(),
+        )
+
+    def test_refused_to_others_without_token(self) -> None:
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_allows_scrapers(self) -> None:
+        client = APIClient()
+
+        response = client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"library_active_borrowings", response.content)
+        self.assertEqual(client.get(METRICS_URL).status_code, 403)
+        response = client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+
+    def test_out_of_stock_count_uses_partial_index(self) -> None:
+        query = Book.objects.filter(inventory=0).order_by().values("id")
+        sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+
+        self.assertIn("library_book_out_of_stock_idx", plan)
@@ -0,0 +1,74 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.models import Book, Borrowing
+
+
+def server_timing(response) -> dict:
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, _, value = metric.partition(";")
+        metrics[name] = value.split("=", 1)[1]
+    return metrics
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(
+            title="Title", author="Author", inventory=3, daily_fee=0.25
+        )
+        Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=date.today() + timedelta(days=5),
+        )
+
+    def test_server_timing_header(self) -> None:
+        with self.assertLogs("library.performance", "INFO") as logs:
+            response = self.client.get(reverse("library:borrowing-list"))
+        metrics = server_timing(response)
+        line = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(int(metrics["sql"]), 2)
+        self.assertIn("app", metrics)
+        self.assertIn("db", metrics)
+        self.assertIn("serializer", metrics)
+        self.assertEqual(line["view"], "BorrowingViewSet.list")
+        self.assertEqual(line["queries"], 2)
+        self.assertEqual(line["response_bytes"], len(response.content))
+
+    def test_action_name_in_log(self) -> None:
+        borrowing = self.client.post(
+            reverse("library:borrowing-list"),
+            {
+                "book": self.book.id,
+                "expected_return_date": date.today() + timedelta(days=5),
+            },
+        )
+        url = reverse(
+            "library:borrowing-return-book", args=[borrowing.data["id"]]
+        )
+
+        with self.assertLogs("library.performance", "INFO") as logs:
+            self.client.post(url)
+        line = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(line["view"], "BorrowingViewSet.return_book")
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request(self) -> None:
+        response = self.client.get(reverse("library:book-list"))
+
+        self.assertNotIn("Server-Timing", response)
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -34,3 +34,56 @@ class ModelsTests(TestCase):
             str(borrowing),
             f"Book: {book.title}, return date: {borrowing.expected_return_date}",
         )
+
+    def test_borrowing_return_many(self) -> None:
+        book = Book.objects.create(
+            title="Title", author="Author", inventory=0, daily_fee=0.25
+        )
+        borrowings = [
+            Borrowing.objects.create(
+                expected_return_date=date.today() + timedelta(days=5),
+                book=book,
+                user=self.user,
+            )
+            for _ in range(3)
+        ]
+        active = {borrowing.id: book.id for borrowing in borrowings}
+
+        returned = Borrowing.objects.return_many(active, date.today())
+
+        self.assertEqual(returned, active)
+        self.assertFalse(
+            Borrowing.objects.filter(
+                pk__in=active, actual_return_date=None
+            ).exists()
+        )
+
+    def test_borrowing_return_many_skips_concurrently_returned(self) -> None:
+        book = Book.objects.create(
+            title="Title", author="Author", inventory=0, daily_fee=0.25
+        )
+        borrowing1, borrowing2 = (
+            Borrowing.objects.create(
+                expected_return_date=date.today() + timedelta(days=5),
+                book=book,
+                user=self.user,
+            )
+            for _ in range(2)
+        )
+        active = {
+            borrowing.id: (book.id, self.user.id)
+            for borrowing in (borrowing1, borrowing2)
+        }
+        # Returned by another request after ``active`` was read.
+        Borrowing.objects.filter(pk=borrowing2.id).update(
+            actual_return_date=date.today()
+        )
+
+        returned = Borrowing.objects.return_many(active, date.today())
+
+        self.assertEqual(returned, {borrowing1.id: (book.id, self.user.id)})
+        self.assertFalse(
+            Borrowing.objects.filter(
+                pk__in=active, actual_return_date=None
+            ).exists()
+        )
@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.models import Book, Borrowing
+from library.tests.query_budget import QueryBudgetMixin
+
+BOOK_URL = reverse("library:book-list")
+BORROWING_URL = reverse("library:borrowing-list")
+
+# Maximum SQL statements per endpoint and role, independent of page size.
+BUDGETS = {
+    "book-list": 2,
+    "book-detail": 1,
+    "borrowing-list": {"user": 2, "staff": 2},
+    "borrowing-detail": {"user": 1, "staff": 1},
+    "admin-borrowing-changelist": 5,
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin123@admin.com", "test1234", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        for index in range(10):
+            book = Book.objects.create(
+                title=f"Title {index}",
+                author="Author",
+                inventory=3,
+                daily_fee=0.25,
+            )
+            Borrowing.objects.create(
+                book=book,
+                user=self.user,
+                expected_return_date=date.today() + timedelta(days=5),
+            )
+        self.borrowing = Borrowing.objects.filter(user=self.user).first()
+
+    def test_book_list(self) -> None:
+        self.assertRequestWithinBudget(
+            self.client, BOOK_URL, BUDGETS["book-list"]
+        )
+
+    def test_book_detail(self) -> None:
+        url = reverse("library:book-detail", args=[self.borrowing.book_id])
+
+        self.assertRequestWithinBudget(
+            self.client, url, BUDGETS["book-detail"]
+        )
+
+    def test_borrowing_list(self) -> None:
+        for role, user in (("user", self.user), ("staff", self.admin)):
+            with self.subTest(role=role):
+                self.client.force_authenticate(user)
+
+                budget = BUDGETS["borrowing-list"][role]
+
+                self.assertRequestWithinBudget(
+                    self.client, BORROWING_URL, budget
+                )
+                self.assertRequestWithinBudget(
+                    self.client, BORROWING_URL, budget, is_active="true"
+                )
+
+    def test_borrowing_detail(self) -> None:
+        url = reverse("library:borrowing-detail", args=[self.borrowing.id])
+
+        for role, user in (("user", self.user), ("staff", self.admin)):
+            with self.subTest(role=role):
+                self.client.force_authenticate(user)
+
+                self.assertRequestWithinBudget(
+                    self.client, url, BUDGETS["borrowing-detail"][role]
+                )
+
+    def test_admin_borrowing_changelist(self) -> None:
+        superuser = get_user_model().objects.create_superuser(
+            "super123@admin.com", "test1234"
+        )
+        self.client.force_login(superuser)
+        url = reverse("admin:library_borrowing_changelist")
+
+        self.assertRequestWithinBudget(
+            self.client, url, BUDGETS["admin-borrowing-changelist"]
+        )
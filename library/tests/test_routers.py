@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TransactionTestCase,
+    override_settings,
+)
+
+from library.cache import (
+    CATALOG_VERSION_KEY,
+    invalidate_borrowings,
+    invalidate_catalog,
+)
+from library.middleware import ReplicaRoutingMiddleware
+from library.models import Book
+from library.routers import ReplicaRouter, read_may_be_stale
+
+ROUTING = {
+    "DATABASE_REPLICAS": ["replica1"],
+    "DATABASE_ROUTERS": ["library.routers.ReplicaRouter"],
+}
+
+
+# Test case transactions would route every read to the primary.
+@override_settings(**ROUTING)
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def request(self, method="get", status=200, write=False, **headers):
+        def view(request):
+            self.seen.append(Book.objects.all().db)
+            if write:
+                self.seen.append(Book.objects.db_manager().db)
+                ReplicaRouter().db_for_write(Book)
+                self.seen.append(Book.objects.all().db)
+            self.seen.append(read_may_be_stale([CATALOG_VERSION_KEY]))
+            return HttpResponse(status=status)
+
+        request = getattr(self.factory, method)("/", **headers)
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_requests_read_from_replica(self) -> None:
+        self.request()
+
+        self.assertEqual(self.seen, ["replica1", False])
+
+    def test_writes_use_primary(self) -> None:
+        response = self.request("post")
+
+        self.assertEqual(self.seen[0], "default")
+        self.assertIn("db_primary", response.cookies)
+
+    def test_reads_after_write_use_primary(self) -> None:
+        self.request(write=True)
+
+        self.assertEqual(self.seen[0], "replica1")
+        self.assertEqual(self.seen[2], "default")
+
+    def test_failed_write_does_not_pin(self) -> None:
+        response = self.request("post", status=400)
+
+        self.assertNotIn("db_primary", response.cookies)
+
+    def test_client_is_pinned_after_write(self) -> None:
+        self.request("post", HTTP_AUTHORIZATION="Bearer a")
+
+        self.request(HTTP_AUTHORIZATION="Bearer a")
+        self.request(HTTP_AUTHORIZATION="Bearer b")
+
+        self.assertEqual(
+            self.seen[2:], ["default", False, "replica1", False]
+        )
+
+    def test_staleness_is_scoped_to_written_versions(self) -> None:
+        invalidate_borrowings([1])
+        self.request()
+        invalidate_catalog()
+        self.request()
+
+        self.assertEqual(self.seen, ["replica1", False, "replica1", True])
+
+    def test_pin_cookie(self) -> None:
+        self.factory.cookies["db_primary"] = "1"
+
+        self.request()
+
+        self.assertEqual(self.seen[0], "default")
+
+    def test_transactions_use_primary(self) -> None:
+        def view(request):
+            with transaction.atomic():
+                self.seen.append(Book.objects.all().db)
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(self.factory.get("/"))
+
+        self.assertEqual(self.seen, ["default"])
+
+    def test_outside_requests_use_primary(self) -> None:
+        self.assertEqual(Book.objects.all().db, "default")
+
+    def test_migrations_only_on_primary(self) -> None:
+        router = ReplicaRouter()
+
+        self.assertTrue(router.allow_migrate("default", "library"))
+        self.assertFalse(router.allow_migrate("replica1", "library"))
@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from library.models import Book, Borrowing
+from library.renderers import FastJSONRenderer
+from library.rows import RowSerializer
+from library.serializers import BookSerializer
+
+BOOK_URL = reverse("library:book-list")
+BORROWING_URL = reverse("library:borrowing-list")
+
+
+class ListParityMixin:
+    """Books and borrowings to compare fast and serializer lists with."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin123@admin.com", "test1234", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        book1 = Book.objects.create(
+            title="Кобзар \u2028 \"quoted\"",
+            author="Тарас",
+            inventory=3,
+            daily_fee="1.50",
+            cover="HARD",
+        )
+        book2 = Book.objects.create(
+            title="1984", author="Orwell", inventory=0, daily_fee=0.2
+        )
+        Borrowing.objects.create(
+            book=book1,
+            user=self.user,
+            expected_return_date=date.today() + timedelta(days=5),
+        )
+        Borrowing.objects.create(
+            book=book2,
+            user=self.admin,
+            expected_return_date=date.today() + timedelta(days=5),
+            actual_return_date=date.today(),
+        )
+
+    def get_content(self, url: str, fast: bool, **params) -> bytes:
+        cache.clear()
+        with override_settings(LIBRARY_FAST_LISTS=fast):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assertParity(self, url: str, **params) -> None:
+        self.assertEqual(
+            self.get_content(url, True, **params),
+            self.get_content(url, False, **params),
+        )
+
+
+class FastListParityTests(ListParityMixin, TestCase):
+    def test_book_list(self) -> None:
+        self.assertParity(BOOK_URL)
+        self.assertParity(BOOK_URL, q="кобз")
+        self.assertParity(BOOK_URL, cursor="", limit=1)
+
+    def test_borrowing_list(self) -> None:
+        for user in (self.user, self.admin):
+            with self.subTest(is_staff=user.is_staff):
+                self.client.force_authenticate(user)
+
+                self.assertParity(BORROWING_URL)
+                self.assertParity(BORROWING_URL, is_active="true")
+                self.assertParity(BORROWING_URL, cursor="", limit=1)
+
+    def test_decimal_and_choice_fields(self) -> None:
+        books = Book.objects.order_by("id")
+        rows = RowSerializer.for_serializer(BookSerializer)
+
+        fast = rows.render(books.values(*rows.columns))
+        expected = BookSerializer(books, many=True).data
+
+        self.assertEqual(
+            JSONRenderer().render(fast), JSONRenderer().render(expected)
+        )
+
+    def test_renderer_matches_json_renderer(self) -> None:
+        data = {
+            "title": "Кобзар \u2028\u2029",
+            "fee": BookSerializer(Book.objects.first()).data["daily_fee"],
+            "date": date.today(),
+            "items": [1, None, True, 0.5],
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+
+class SparseFieldsTests(ListParityMixin, TestCase):
+    def get(self, url: str, **params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries[-1]["sql"]
+
+    def test_parity_with_sparse_fields(self) -> None:
+        self.assertParity(BOOK_URL, fields="id,title,inventory")
+        self.assertParity(BOOK_URL, fields="daily_fee", cursor="", limit=1)
+        self.client.force_authenticate(self.admin)
+        self.assertParity(BORROWING_URL, fields="id,book,user", cursor="")
+
+    def test_book_list_selects_requested_columns(self) -> None:
+        response, sql = self.get(BOOK_URL, fields="id,inventory,title")
+
+        self.assertEqual(
+            list(response.data["results"][0]), ["id", "title", "inventory"]
+        )
+        self.assertNotIn('"daily_fee"', sql)
+        self.assertNotIn('"cover"', sql)
+
+    def test_keyset_pagination_reads_ordering_columns(self) -> None:
+        books = Book.objects.order_by("title", "author", "id")
+
+        response, sql = self.get(BOOK_URL, fields="id", cursor="", limit=1)
+        following = self.client.get(response.data["next"])
+
+        self.assertIn('"author"', sql)
+        self.assertEqual(response.data["results"], [{"id": books[0].id}])
+        self.assertEqual(following.data["results"], [{"id": books[1].id}])
+
+    def test_book_is_joined_only_when_requested(self) -> None:
+        self.client.force_authenticate(self.admin)
+
+        response, sql = self.get(BORROWING_URL, fields="id,user")
+        joined, joined_sql = self.get(BORROWING_URL, fields="id,book")
+
+        self.assertEqual(list(response.data["results"][0]), ["id", "user"])
+        self.assertNotIn("JOIN", sql)
+        self.assertIn("JOIN", joined_sql)
+        self.assertIn("title", joined.data["results"][0]["book"])
+
+    def test_retrieve(self) -> None:
+        self.client.force_authenticate(self.user)
+        borrowing = Borrowing.objects.get(user=self.user)
+        url = reverse("library:borrowing-detail", args=[borrowing.id])
+
+        response, sql = self.get(url, fields="expected_return_date")
+
+        self.assertEqual(list(response.data), ["expected_return_date"])
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn('"actual_return_date"', sql.split("FROM")[0])
+
+    def test_unknown_field(self) -> None:
+        response = self.client.get(BOOK_URL, {"fields": "id,password"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.data["fields"][0])
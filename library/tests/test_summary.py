@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import call, patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.models import Book, Borrowing, BorrowingSummary
+from library.summary import (
+    build_summary,
+    get_summary,
+    rebuild_summary,
+    record_returns,
+)
+
+BORROWING_URL = reverse("library:borrowing-list")
+BATCH_CHECKOUT_URL = reverse("library:borrowing-batch-checkout")
+BULK_RETURN_URL = reverse("library:borrowing-bulk-return")
+SUMMARY_URL = reverse("user:summary")
+
+
+class BorrowingSummaryTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        self.admin = get_user_model().objects.create_user(
+            "admin123@admin.com", "test1234", is_staff=True
+        )
+        self.book = Book.objects.create(
+            title="Zapovit", author="Shevchenko", inventory=5, daily_fee=1.5
+        )
+        self.client.force_authenticate(self.user)
+        self.today = date.today()
+
+    def checkout(self, days: int) -> int:
+        response = self.client.post(
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": self.today + timedelta(days=days),
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def summary(self) -> BorrowingSummary:
+        return BorrowingSummary.objects.get(user=self.user)
+
+    def assertConsistent(self) -> None:
+        expected = build_summary(self.user.id)
+        summary = self.summary()
+        self.assertEqual(summary.active_loans, expected.active_loans)
+        self.assertEqual(summary.late_fees, expected.late_fees)
+
+    def test_endpoint_reads_one_row(self) -> None:
+        self.checkout(days=3)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(
+            response.data,
+            {
+                "active": 1,
+                "overdue": 0,
+                "accrued_fees": "0.00",
+                "next_due_date": str(self.today + timedelta(days=3)),
+            },
+        )
+
+    def test_overdue_loans_accrue_fees(self) -> None:
+        self.checkout(days=2)
+        self.checkout(days=8)
+
+        report = self.summary().report(self.today + timedelta(days=5))
+
+        self.assertEqual(report["active"], 2)
+        self.assertEqual(report["overdue"], 1)
+        self.assertEqual(report["accrued_fees"], Decimal("4.50"))
+        self.assertEqual(report["next_due_date"], self.today + timedelta(8))
+
+    def test_checkout_extend_and_return(self) -> None:
+        first = self.checkout(days=2)
+        self.client.post(
+            BATCH_CHECKOUT_URL,
+            [
+                {"book": self.book.id, "expected_return_date": self.today},
+                {"book": self.book.id, "expected_return_date": self.today},
+            ],
+            format="json",
+        )
+        self.assertConsistent()
+
+        self.client.patch(
+            reverse("library:borrowing-detail", args=[first]),
+            {"expected_return_date": self.today + timedelta(days=9)},
+        )
+        self.assertConsistent()
+
+        self.client.post(
+            reverse("library:borrowing-return-book", args=[first])
+        )
+        self.client.force_authenticate(self.admin)
+        ids = Borrowing.objects.filter(user=self.user).values_list("id")
+        self.client.post(
+            BULK_RETURN_URL, {"ids": [id_ for id_, in ids]}, format="json"
+        )
+
+        self.assertConsistent()
+        self.assertEqual(self.summary().report()["active"], 0)
+
+    def test_late_return_keeps_its_fee(self) -> None:
+        borrowing_id = self.checkout(days=1)
+
+        with transaction.atomic():
+            record_returns(
+                {borrowing_id: self.user.id}, self.today + timedelta(days=4)
+            )
+
+        self.assertEqual(self.summary().active_loans, [])
+        self.assertEqual(self.summary().late_fees, Decimal("4.50"))
+
+    def test_missing_summary_is_built(self) -> None:
+        Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=self.today - timedelta(days=4),
+            actual_return_date=self.today - timedelta(days=2),
+        )
+        Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            expected_return_date=self.today - timedelta(days=1),
+        )
+        BorrowingSummary.objects.filter(user=self.user).delete()
+
+        report = get_summary(self.user.id).report()
+
+        self.assertEqual(report["active"], 1)
+        self.assertEqual(report["overdue"], 1)
+        self.assertEqual(report["accrued_fees"], Decimal("4.50"))
+        self.assertTrue(BorrowingSummary.objects.filter(user=self.user))
+
+    def test_destroy_rebuilds_summary(self) -> None:
+        borrowing_id = self.checkout(days=3)
+        self.client.force_authenticate(self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("library:borrowing-detail", args=[borrowing_id])
+            )
+
+        self.assertEqual(self.summary().active_loans, [])
+
+    def test_book_delete_rebuilds_summary_once(self) -> None:
+        deleted = self.book
+        self.checkout(days=3)
+        self.checkout(days=5)
+        self.book = Book.objects.create(
+            title="Kobzar", author="Shevchenko", inventory=5, daily_fee=1
+        )
+        kept = self.checkout(days=4)
+        self.client.force_authenticate(self.admin)
+
+        with patch(
+            "library.summary.rebuild_summary", wraps=rebuild_summary
+        ) as rebuild, self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("library:book-detail", args=[deleted.id])
+            )
+
+        # Users left pending by earlier rolled back tests may come along.
+        self.assertEqual(
+            rebuild.call_args_list.count(call(self.user.id)), 1
+        )
+        self.assertEqual(
+            [item["id"] for item in self.summary().active_loans], [kept]
+        )
+        self.assertConsistent()
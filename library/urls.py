@@ -1,6 +1,13 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework import routers
 
+from library.async_views import (
+    DETAIL_ACTIONS,
+    LIST_ACTIONS,
+    async_read_view,
+    book_events,
+)
 from library.views import BookViewSet, BorrowingViewSet
 
 router = routers.DefaultRouter()
@@ -11,4 +18,27 @@ urlpatterns = [
     path("", include(router.urls)),
 ]
 
+if settings.LIBRARY_ASYNC_READS:
+    # Same routes and names as the router, matched first.
+    urlpatterns = [
+        re_path(
+            rf"^{prefix}/$",
+            async_read_view(viewset, LIST_ACTIONS),
+            name=f"{basename}-list",
+        )
+        for prefix, viewset, basename in router.registry
+    ] + [
+        re_path(
+            rf"^{prefix}/(?P<pk>[^/.]+)/$",
+            async_read_view(viewset, DETAIL_ACTIONS),
+            name=f"{basename}-detail",
+        )
+        for prefix, viewset, basename in router.registry
+    ] + urlpatterns
+
+# Before the book routes, which would take "events" for a book id
+urlpatterns.insert(
+    0, path("books/events/", book_events, name="book-events")
+)
+
 app_name = "library"
@@ -1,48 +1,115 @@
+import io
+from collections import Counter
 from datetime import date
 
+from django.db import transaction
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+    renderer_classes,
+)
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from library.models import Book, Borrowing
-from library.permissions import IsAdminOrReadOnly
+from library.authentication import MetricsTokenAuthentication
+from library.cache import (
+    CATALOG_VERSION_KEY,
+    borrowings_version_key,
+    cache_catalog_response,
+    catalog_version,
+    conditional_response,
+    get_version,
+    invalidate_borrowings,
+)
+from library.export import EXPORT_FORMATS, export_borrowings
+from library.importer import BookImporter, guess_format, read_rows
+from library.metrics import (
+    CONTENT_TYPE,
+    business_gauges,
+    registry,
+    render as render_metrics,
+)
+from library.models import Book, Borrowing, BorrowingHistory
+from library.pagination import KeysetPagination
+from library.rows import FastListMixin, SparseFieldsMixin
+from library.permissions import HasMetricsToken, IsAdminOrReadOnly
+from library.renderers import PrometheusRenderer
+from library.search import search_books
+from library.summary import record_returns
 from library.serializers import (
     BookSerializer,
+    BookImportSerializer,
     BookListSerializer,
     BorrowingSerializer,
+    BorrowingBatchSerializer,
+    BorrowingBulkReturnSerializer,
     BorrowingListSerializer,
     BorrowingListStaffSerializer,
     BorrowingDetailSerializer,
 )
 
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields",
+    type=OpenApiTypes.STR,
+    description=(
+        "Comma-separated fields to return, only their columns are read"
+        "(ex. ?fields=id,title,inventory)"
+    ),
+)
+
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ("title", "author", "id")
+    import_errors_limit = 1000
 
     def get_serializer_class(self):
-        if self.action == "list":
+        # Sparse fieldsets choose from all fields of a book.
+        if self.action == "list" and not self.requested_fields():
             return BookListSerializer
+        if self.action == "import_books":
+            return BookImportSerializer
         return BookSerializer
 
     def get_queryset(self):
         queryset = self.queryset
+        q = self.request.query_params.get("q")
         title = self.request.query_params.get("title")
         author = self.request.query_params.get("author")
 
-        if title:
-            queryset = queryset.filter(title__icontains=title)
-        if author:
-            queryset = queryset.filter(author__icontains=author)
+        if q or title or author:
+            queryset = search_books(queryset, q=q, title=title, author=author)
 
         return queryset
 
+    def get_etag_version_keys(self):
+        return [CATALOG_VERSION_KEY]
+
+    def get_etag_version(self):
+        return catalog_version()
+
     @extend_schema(
         parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Search title and author by word prefixes, "
+                    "ranked by relevance(ex. ?q=orwell 198)"
+                ),
+            ),
             OpenApiParameter(
                 "title",
                 type=OpenApiTypes.STR,
@@ -53,16 +120,68 @@ class BookViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 description="Filter by author(ex. ?author=Orwell)",
             ),
+            FIELDS_PARAMETER,
         ]
     )
+    @conditional_response
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=[FIELDS_PARAMETER])
+    @conditional_response
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class BorrowingViewSet(viewsets.ModelViewSet):
-    queryset = Borrowing.objects.all()
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        parser_classes=(MultiPartParser,),
+    )
+    def import_books(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get(
+            "file_format", guess_format(upload.name)
+        )
+        errors = []
+
+        def on_error(line, row, error) -> None:
+            if len(errors) < self.import_errors_limit:
+                errors.append({"line": line, "row": row, "errors": error})
+
+        source = io.TextIOWrapper(
+            upload.file, encoding="utf-8-sig", newline=""
+        )
+        try:
+            importer = BookImporter(
+                batch_size=serializer.validated_data["batch_size"],
+                on_error=on_error,
+            ).run(read_rows(source, file_format))
+        finally:
+            # Closing the wrapper when it is collected would close the
+            # upload as well.
+            source.detach()
+
+        return Response(
+            {**importer.summary(), "errors": errors},
+            status=status.HTTP_200_OK,
+        )
+
+
+class BorrowingViewSet(
+    SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet
+):
+    queryset = Borrowing.objects.select_related("book")
     serializer_class = BorrowingSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-borrow_date", "-id")
+    # Actions that also see archived borrowings
+    history_actions = ("list", "retrieve", "return_book", "export")
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
@@ -71,6 +190,10 @@ class BorrowingViewSet(viewsets.ModelViewSet):
             return BorrowingListSerializer
         if self.action in ("update", "partial_update"):
             return BorrowingDetailSerializer
+        if self.action == "batch_checkout":
+            return BorrowingBatchSerializer
+        if self.action == "bulk_return":
+            return BorrowingBulkReturnSerializer
 
         return BorrowingSerializer
 
@@ -79,9 +202,13 @@ class BorrowingViewSet(viewsets.ModelViewSet):
         is_active = self.request.query_params.get("is_active")
         user_id = self.request.query_params.get("user_id")
 
-        if is_active:
-            if is_active.lower().capitalize() == "True":
-                queryset = queryset.filter(actual_return_date=None)
+        if is_active and is_active.lower().capitalize() == "True":
+            # Active borrowings are never archived.
+            queryset = queryset.filter(actual_return_date=None)
+        elif self.action in self.history_actions:
+            # Keyset pages of the history merge the date (or user) index
+            # scans of both tables, see test_history_list_merges_indexes.
+            queryset = BorrowingHistory.objects.select_related("book")
         if not self.request.user.is_staff:
             queryset = queryset.filter(user=self.request.user)
         elif user_id:
@@ -89,6 +216,22 @@ class BorrowingViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_etag_version_keys(self):
+        user = self.request.user
+        return [
+            CATALOG_VERSION_KEY,
+            borrowings_version_key(None if user.is_staff else user.id),
+        ]
+
+    def get_etag_version(self):
+        versions = tuple(
+            get_version(key) for key in self.get_etag_version_keys()
+        )
+        user = self.request.user
+        if user.is_staff:
+            return versions
+        return (*versions, user.id)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -101,13 +244,20 @@ class BorrowingViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.INT,
                 description="Filter by user_id(ex. ?user_id=3)",
             ),
+            FIELDS_PARAMETER,
         ]
     )
+    @conditional_response
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=[FIELDS_PARAMETER])
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_permissions(self):
-        if self.action == "destroy":
+        if self.action in ("destroy", "bulk_return", "export"):
             return [IsAdminUser()]
 
         return super().get_permissions()
@@ -115,17 +265,114 @@ class BorrowingViewSet(viewsets.ModelViewSet):
     @action(methods=["POST"], detail=True, url_path="return-book")
     def return_book(self, request, pk=None):
         borrowing = self.get_object()
-        if borrowing.actual_return_date is None:
-            borrowing.actual_return_date = date.today()
-            borrowing.book.inventory += 1
-            borrowing.book.save()
-            borrowing.save()
+        today = date.today()
+        with transaction.atomic():
+            returned = Borrowing.objects.filter(
+                pk=borrowing.pk, actual_return_date=None
+            ).update(actual_return_date=today)
+            if returned:
+                Book.objects.release(borrowing.book_id)
+                invalidate_borrowings([borrowing.user_id])
+                record_returns({borrowing.pk: borrowing.user_id}, today)
 
+        if returned:
             return Response(status=status.HTTP_200_OK)
 
         return Response(
             "Book is already returned", status.HTTP_406_NOT_ACCEPTABLE
         )
 
+    @extend_schema(
+        request=BorrowingBatchSerializer(many=True),
+        responses={201: BorrowingBatchSerializer(many=True)},
+    )
+    @action(methods=["POST"], detail=False, url_path="batch-checkout")
+    def batch_checkout(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=["POST"], detail=False, url_path="bulk-return")
+    def bulk_return(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        today = date.today()
+
+        with transaction.atomic():
+            active = {
+                borrowing_id: (book_id, user_id)
+                for borrowing_id, book_id, user_id in (
+                    Borrowing.objects.select_for_update()
+                    .filter(pk__in=ids, actual_return_date=None)
+                    .values_list("id", "book_id", "user_id")
+                )
+            }
+            active = Borrowing.objects.return_many(active, today)
+            if active:
+                book_ids, user_ids = zip(*active.values())
+                Book.objects.release_many(Counter(book_ids))
+                invalidate_borrowings(user_ids)
+                record_returns(
+                    {
+                        borrowing_id: user_id
+                        for borrowing_id, (_, user_id) in active.items()
+                    },
+                    today,
+                )
+            existing = set(
+                Borrowing.objects.filter(pk__in=ids - active.keys())
+                .values_list("id", flat=True)
+            )
+
+        return Response(
+            {
+                "returned": sorted(active),
+                "already_returned": sorted(existing),
+                "not_found": sorted(ids - active.keys() - existing),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=tuple(EXPORT_FORMATS),
+                description="Export format(ex. ?output=ndjson)",
+            ),
+            OpenApiParameter("is_active", type=OpenApiTypes.BOOL),
+            OpenApiParameter("user_id", type=OpenApiTypes.INT),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        export_format = request.query_params.get("output", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                f"Unknown export format: {export_format}",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return export_borrowings(self.get_queryset(), export_format)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+@extend_schema(exclude=True)
+@api_view(["GET"])
+@authentication_classes(
+    [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+)
+@permission_classes([IsAdminUser | HasMetricsToken])
+@renderer_classes([PrometheusRenderer])
+def metrics_view(request):
+    return Response(
+        render_metrics(registry.collect(), business_gauges()),
+        content_type=CONTENT_TYPE,
+    )
@@ -46,8 +46,8 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "drf_spectacular",
-    "debug_toolbar",
     "library",
     "user",
 ]
@@ -56,8 +56,10 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "library.middleware.MetricsMiddleware",
+    "library.middleware.ServerTimingMiddleware",
+    "library.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -65,6 +67,42 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.common.CommonMiddleware"),
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
+# Share of requests measured by ServerTimingMiddleware
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get("SERVER_TIMING_SAMPLE_RATE", 1 if DEBUG else 0.05)
+)
+
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+# Bearer token of the Prometheus scraper; unset, only staff users can
+# read /metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "library.performance": {
+            "handlers": ["console"],
+            # Development relies on the Server-Timing header instead
+            "level": os.environ.get(
+                "PERFORMANCE_LOG_LEVEL", "WARNING" if DEBUG else "INFO"
+            ),
+            "propagate": False,
+        },
+    },
+}
+
 ROOT_URLCONF = "library_service_api.urls"
 
 TEMPLATES = [
@@ -88,13 +126,99 @@ WSGI_APPLICATION = "library_service_api.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+DATABASE_ENGINE = os.environ.get(
+    "DJANGO_DB_ENGINE", "django.db.backends.sqlite3"
+)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": DATABASE_ENGINE,
+        "NAME": os.environ.get("DJANGO_DB_NAME") or BASE_DIR / "db.sqlite3",
+        # Keep connections between requests, checked before being reused
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+if not DATABASE_ENGINE.endswith("sqlite3"):
+    DATABASES["default"].update(
+        {
+            "USER": os.environ.get("DJANGO_DB_USER", ""),
+            "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", ""),
+            "HOST": os.environ.get("DJANGO_DB_HOST", ""),
+            "PORT": os.environ.get("DJANGO_DB_PORT", ""),
+            # Transaction poolers like PgBouncer can't keep server-side
+            # cursors open between transactions
+            "DISABLE_SERVER_SIDE_CURSORS": (
+                os.environ.get("DJANGO_DB_POOLER", "") == "True"
+            ),
+        }
+    )
+
+# Read-only copies of the default database: SQLite file names or, for
+# server databases, host names
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get("DJANGO_DB_REPLICAS", "").split(",")), 1
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if DATABASE_ENGINE.endswith("sqlite3"):
+        DATABASES[alias]["NAME"] = replica.strip()
+    else:
+        DATABASES[alias]["HOST"] = replica.strip()
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["library.routers.ReplicaRouter"]
+
+# Seconds a client reads from the primary after writing, and replica
+# reads are kept out of the caches whose version was bumped
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+
+# Borrowings returned longer ago are moved by archive_borrowings
+BORROWING_ARCHIVE_AFTER_DAYS = int(
+    os.environ.get("BORROWING_ARCHIVE_AFTER_DAYS", 180)
+)
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+}
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHE_BACKEND = os.environ.get(
+    "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+if CACHE_BACKEND.endswith("LocMemCache"):
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.environ.get("DJANGO_CACHE_MAX_ENTRIES", 1000)),
+    }
+
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300))
+
+# Cache catalog responses and answer If-None-Match with 304. Both rely
+# on versions every worker must see, so they are off by default with a
+# per-process cache outside of DEBUG (a single runserver process); use a
+# shared backend (Redis, Memcached) for several workers
+LIBRARY_RESPONSE_CACHE = (
+    os.environ.get("LIBRARY_RESPONSE_CACHE")
+    or str(DEBUG or not CACHE_BACKEND.endswith(("LocMemCache", "DummyCache")))
+) == "True"
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -135,14 +259,38 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": (
+        "library.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 20,
 }
 
+# Serve list endpoints from values() rows instead of model serializers
+LIBRARY_FAST_LISTS = os.environ.get("LIBRARY_FAST_LISTS", "") != "False"
+
+# Serve book and borrowing list/retrieve with async views (for ASGI)
+LIBRARY_ASYNC_READS = os.environ.get("LIBRARY_ASYNC_READS", "") == "True"
+
+# Directory of the sockets sharing inventory changes between the worker
+# processes of a host; unset, changes only reach streams of the same
+# process
+INVENTORY_EVENTS_DIR = os.environ.get("INVENTORY_EVENTS_DIR") or None
+# Seconds a book availability stream stays open before the client
+# reconnects, and between keepalive comments
+INVENTORY_STREAM_TIMEOUT = float(
+    os.environ.get("INVENTORY_STREAM_TIMEOUT", 300)
+)
+INVENTORY_STREAM_KEEPALIVE = float(
+    os.environ.get("INVENTORY_STREAM_KEEPALIVE", 15)
+)
+INVENTORY_STREAM_MAX_BOOKS = 100
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Library Service API",
     "DESCRIPTION": "Documentation for service for managing and borrowing books",
@@ -154,4 +302,18 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
 }
+
+# Seconds a user's is_active/is_staff is trusted for claims authentication
+JWT_USER_STATE_TIMEOUT = int(os.environ.get("JWT_USER_STATE_TIMEOUT", 60))
+
+# False positive rate of the in-process refresh token blacklist filter
+TOKEN_BLACKLIST_ERROR_RATE = float(
+    os.environ.get("TOKEN_BLACKLIST_ERROR_RATE", 0.001)
+)
+# Seconds between blacklist reloads when no change is seen in the cache
+TOKEN_BLACKLIST_SYNC_INTERVAL = float(
+    os.environ.get("TOKEN_BLACKLIST_SYNC_INTERVAL", 60)
+)
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from user.blacklist import token_blacklist
+
+STAFF_CLAIM = "is_staff"
+
+
+def user_state_key(user_id) -> str:
+    return f"user:{user_id}:auth_state"
+
+
+def get_user_state(user_id) -> dict:
+    """
+    Return ``is_active`` and ``is_staff`` of a user, cached for a while.
+
+    Entries live for ``JWT_USER_STATE_TIMEOUT`` seconds and are dropped
+    when the user is saved or deleted, so with a shared cache revocation
+    is immediate and otherwise delayed by at most the timeout. Deleted
+    users are cached as inactive.
+    """
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values("is_active", "is_staff")
+            .first()
+        ) or {"is_active": False, "is_staff": False}
+        cache.set(key, state, settings.JWT_USER_STATE_TIMEOUT)
+    return state
+
+
+def forget_user_state(user_id) -> None:
+    cache.delete(user_state_key(user_id))
+
+
+class StateRefreshToken(RefreshToken):
+    """
+    Refresh token issuing access tokens with the current ``is_staff``.
+
+    The blacklist is checked through the in-process filter of
+    ``user.blacklist``. Issued tokens are not recorded as outstanding;
+    a token gets its outstanding row when it is blacklisted, so the
+    table only holds blacklisted tokens until they expire.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return super(BlacklistMixin, cls).for_user(user)
+
+    def check_blacklist(self) -> None:
+        if token_blacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    @property
+    def access_token(self):
+        state = get_user_state(self[api_settings.USER_ID_CLAIM])
+        if not state["is_active"]:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        self[STAFF_CLAIM] = state["is_staff"]
+        return super().access_token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authenticate from the access token claims instead of the user row.
+
+    The user id and ``is_staff`` come from the token; only the cached
+    user state is checked, so deactivated users and staff tokens of
+    demoted users are refused. ``request.user`` is a ``User`` holding
+    just those fields, the others are loaded on first access. Tokens
+    issued without the claim fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if STAFF_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        state = get_user_state(user_id)
+        if not state["is_active"]:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        is_staff = validated_token[STAFF_CLAIM]
+        if is_staff and not state["is_staff"]:
+            raise AuthenticationFailed(
+                _("Token is revoked"), code="token_revoked"
+            )
+
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            [api_settings.USER_ID_FIELD, "is_active", "is_staff"],
+            [user_id, True, is_staff],
+        )
@@ -0,0 +1,116 @@
+"""
+In-process lookup of blacklisted refresh tokens.
+
+Every process keeps a Bloom filter of the jtis in the ``token_blacklist``
+table, so refreshing a token that was never blacklisted costs no query;
+only filter hits are confirmed with an exact lookup. The filter is built
+on first use, updated directly on logout and reloaded incrementally when
+the shared version key changes (bumped whenever a token is blacklisted)
+or at least every ``TOKEN_BLACKLIST_SYNC_INTERVAL`` seconds. Purged
+tokens stay in the filter until it is rebuilt; that only costs an exact
+lookup when such a token is presented again.
+"""
+import threading
+import time
+from datetime import timedelta
+from hashlib import blake2b
+from math import ceil, log
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from library.cache import get_version
+
+BLACKLIST_VERSION_KEY = "user:token_blacklist:version"
+MIN_CAPACITY = 1024
+# Rows committed by slower transactions can be older than the last load.
+RELOAD_OVERLAP = timedelta(minutes=5)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class TokenBlacklist:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.filter = None
+        self.version = None
+        self.loaded_at = None
+        self.next_sync = 0.0
+
+    def sync(self) -> None:
+        version = get_version(BLACKLIST_VERSION_KEY)
+        if version == self.version and time.monotonic() < self.next_sync:
+            return
+
+        with self.lock:
+            bloom = self.filter
+            if bloom is None or bloom.count > bloom.capacity:
+                self.rebuild()
+            else:
+                self.reload()
+            self.version = version
+            self.next_sync = (
+                time.monotonic() + settings.TOKEN_BLACKLIST_SYNC_INTERVAL
+            )
+
+    def jtis(self):
+        return BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list("token__jti", flat=True)
+
+    def rebuild(self) -> None:
+        self.loaded_at = timezone.now()
+        jtis = list(self.jtis())
+        self.filter = BloomFilter(
+            max(len(jtis) * 2, MIN_CAPACITY),
+            settings.TOKEN_BLACKLIST_ERROR_RATE,
+        )
+        for jti in jtis:
+            self.filter.add(jti)
+
+    def reload(self) -> None:
+        since = self.loaded_at - RELOAD_OVERLAP
+        self.loaded_at = timezone.now()
+        for jti in self.jtis().filter(blacklisted_at__gte=since):
+            if jti not in self.filter:
+                self.filter.add(jti)
+
+    def add(self, jti: str) -> None:
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+    def contains(self, jti: str) -> bool:
+        self.sync()
+        if jti not in self.filter:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+token_blacklist = TokenBlacklist()
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+
+from user.authentication import STAFF_CLAIM, StateRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -52,3 +55,18 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = StateRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        """Embed ``is_staff`` so requests can be authorized from claims"""
+        token = super().get_token(user)
+        token[STAFF_CLAIM] = user.is_staff
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = StateRefreshToken
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from library.cache import invalidate
+from user.authentication import forget_user_state
+from user.blacklist import BLACKLIST_VERSION_KEY
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_state_on_change(sender, instance, **kwargs) -> None:
+    forget_user_state(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def sync_token_blacklist_on_change(sender, using, **kwargs) -> None:
+    invalidate(BLACKLIST_VERSION_KEY, using=using)
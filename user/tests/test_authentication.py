@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+BOOK_URL = reverse("library:book-list")
+BORROWING_URL = reverse("library:borrowing-list")
+TOKEN_URL = reverse("user:token_obtain_pair")
+REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+
+    def login(self, email="test123@test.com", password="Test1234") -> dict:
+        response = self.client.post(
+            TOKEN_URL, {"email": email, "password": password}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access']}"
+        )
+        return response.data
+
+    def test_access_token_has_staff_claim(self) -> None:
+        tokens = self.login()
+
+        self.assertIs(AccessToken(tokens["access"])["is_staff"], False)
+
+    def test_reads_skip_user_lookup(self) -> None:
+        self.login()
+        self.client.get(BORROWING_URL)
+
+        # Count and page of borrowings only.
+        with self.assertNumQueries(2):
+            response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_and_profile_work_with_claims_user(self) -> None:
+        self.login()
+
+        response = self.client.patch(ME_URL, {"first_name": "Taras"})
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Taras")
+        self.assertEqual(self.user.email, "test123@test.com")
+
+    def test_deactivated_user_is_refused(self) -> None:
+        tokens = self.login()
+        self.client.get(BORROWING_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(BORROWING_URL)
+        refresh = self.client.post(REFRESH_URL, {"refresh": tokens["refresh"]})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(refresh.status_code, 401)
+
+    def test_demoted_staff_token_is_refused(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        self.login()
+        self.assertEqual(self.client.post(BOOK_URL, {}).status_code, 400)
+
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get(BOOK_URL)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_uses_current_staff_flag(self) -> None:
+        tokens = self.login()
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.post(
+            REFRESH_URL, {"refresh": tokens["refresh"]}
+        )
+
+        self.assertIs(AccessToken(response.data["access"])["is_staff"], True)
+
+    def test_token_without_claim_falls_back_to_database(self) -> None:
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.blacklist import BloomFilter, TokenBlacklist, token_blacklist
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+REFRESH_URL = reverse("user:token_refresh")
+LOGOUT_URL = reverse("user:logout")
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self) -> None:
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"jti-{index}" for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(
+            f"other-{index}" in bloom for index in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        token_blacklist.filter = None
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test123@test.com",
+            "Test1234",
+        )
+        response = self.client.post(
+            TOKEN_URL, {"email": "test123@test.com", "password": "Test1234"}
+        )
+        self.tokens = response.data
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}"
+        )
+
+    def refresh(self):
+        return self.client.post(
+            REFRESH_URL, {"refresh": self.tokens["refresh"]}
+        )
+
+    def test_login_does_not_store_outstanding_token(self) -> None:
+        self.assertFalse(OutstandingToken.objects.exists())
+
+    def test_refresh_skips_blacklist_query(self) -> None:
+        self.assertEqual(self.refresh().status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.refresh()
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_logged_out_token_is_refused(self) -> None:
+        self.refresh()
+
+        response = self.client.post(
+            LOGOUT_URL, {"refresh_token": self.tokens["refresh"]}
+        )
+
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.refresh().status_code, 401)
+
+    def test_other_processes_see_logout(self) -> None:
+        other = TokenBlacklist()
+        jti = RefreshToken(self.tokens["refresh"])["jti"]
+        self.assertFalse(other.contains(jti))
+
+        self.client.post(
+            LOGOUT_URL, {"refresh_token": self.tokens["refresh"]}
+        )
+
+        self.assertTrue(other.contains(jti))
+
+    def test_purge_expired_tokens(self) -> None:
+        self.client.post(
+            LOGOUT_URL, {"refresh_token": self.tokens["refresh"]}
+        )
+        expired = OutstandingToken.objects.create(
+            jti="expired",
+            token="x",
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        BlacklistedToken.objects.create(token=expired)
+        out = StringIO()
+
+        call_command("purge_tokens", batch_size=1, stdout=out)
+
+        self.assertIn("Purged 1 expired tokens", out.getvalue())
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertFalse(OutstandingToken.objects.filter(jti="expired"))
@@ -4,13 +4,19 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from user.views import CreateUserView, ManageUserView, LogoutView
+from user.views import (
+    BorrowingSummaryView,
+    CreateUserView,
+    ManageUserView,
+    LogoutView,
+)
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("me/", ManageUserView.as_view(), name="manage"),
+    path("me/summary/", BorrowingSummaryView.as_view(), name="summary"),
     path("logout/", LogoutView.as_view(), name="logout"),
 ]
 
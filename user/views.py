@@ -1,11 +1,14 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics, status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from library.serializers import BorrowingSummarySerializer
+from library.summary import get_summary
+from user.authentication import StateRefreshToken
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -23,7 +26,18 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user may only hold the token claims
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+class BorrowingSummaryView(generics.RetrieveAPIView):
+    """Active and overdue borrowings, accrued late fees, next due date"""
+
+    serializer_class = BorrowingSummarySerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self):
+        return get_summary(self.request.user.pk)
 
 
 class LogoutView(APIView):
@@ -32,7 +46,7 @@ class LogoutView(APIView):
     def post(self, request) -> Response:
         try:
             refresh_token = request.data["refresh_token"]
-            token = RefreshToken(refresh_token)
+            token = StateRefreshToken(refresh_token)
             token.blacklist()
 
             return Response(status=status.HTTP_205_RESET_CONTENT)